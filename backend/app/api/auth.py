@@ -8,16 +8,25 @@ from database import get_db
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserResponse, Token
 from app.services.auth_service import (
-    verify_password, 
-    get_password_hash, 
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     get_current_user
 )
+from app.utils.bounded_pool import PoolBusyError
 from config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
+def _password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
@@ -38,7 +47,10 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PoolBusyError:
+        raise _password_pool_busy()
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -63,7 +75,12 @@ async def login(
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        valid = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except PoolBusyError:
+        raise _password_pool_busy()
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
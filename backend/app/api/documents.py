@@ -1,33 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Response
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, status, Response
+from fastapi.responses import StreamingResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
+from datetime import timedelta
 import os
 import uuid
 import json
+import hashlib
 import logging
 from database import get_db
-from app.models.models import Document, Tag, DocumentChunk, User
+from app.models.models import Document, Tag, DocumentChunk, User, ExportJob
 from app.schemas.schemas import (
     DocumentResponse, TagResponse, DocumentPreviewResponse, DocumentUpdate,
     DocumentVersionResponse, DocumentShareCreate, DocumentShareResponse,
     DocumentStatsResponse, DocumentFavoriteResponse, BulkUpdateRequest,
-    BulkShareRequest, ExportRequest
+    BulkShareRequest, ExportRequest, ExportJobCreate, ExportJobResponse
 )
 from app.services.auth_service import get_current_user
-from app.services.document_processor import document_processor
 from app.services.qdrant_service import qdrant_service
 from app.services.version_service import version_service
 from app.services.share_service import share_service
 from app.services.analytics_service import analytics_service
+from app.services.analytics_buffer import analytics_buffer
 from app.services.favorite_service import favorite_service
-from app.services.export_service import export_service
-from app.services.storage_service import storage_service
-from app.tasks import process_document_task
+from app.services.document_service import document_service
+from app.services.export_service import export_service, EXPORT_FORMATS
+from app.services.storage_service import storage_service, FileTooLargeError, content_disposition
+from app.services.extracted_text_service import extracted_text_service
+from app.tasks import process_document_task, export_documents_task
+from app.utils.http_range import parse_range_header, RangeNotSatisfiable
 from config import settings
-import io
 
 router = APIRouter(prefix="/api/documents", tags=["Documents"])
 logger = logging.getLogger(__name__)
@@ -51,11 +56,8 @@ async def upload_document(
             detail="Only PDF, DOCX, DOC, and MD files are supported"
         )
     
-    # Read file content
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    if file_size > settings.max_file_size:
+    # Reject early when the multipart parser already knows the size
+    if file.size is not None and file.size > settings.max_file_size:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
@@ -65,11 +67,19 @@ async def upload_document(
     unique_filename = f"{uuid.uuid4()}_{file.filename}"
     
     try:
-        # Upload to MinIO
-        storage_service.upload_file(
-            file_content, 
-            unique_filename, 
-            content_type=file.content_type
+        # Stream the spooled upload to MinIO in parts, off the event loop;
+        # the size limit is enforced and the hash computed while streaming
+        file_size, content_hash = await run_in_threadpool(
+            storage_service.upload_stream,
+            file.file,
+            unique_filename,
+            content_type=file.content_type or "application/octet-stream",
+            max_size=settings.max_file_size
+        )
+    except FileTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
@@ -84,6 +94,7 @@ async def upload_document(
         file_type=file_ext,
         file_path=unique_filename, # Storing object name as file_path
         file_size=file_size,
+        content_hash=content_hash,
         owner_id=current_user.id,
         description=description,
         is_public=is_public,
@@ -219,8 +230,10 @@ async def delete_document(
         storage_service.delete_file(document.file_path)
     except Exception as e:
         logger.error(f"Error deleting file from storage: {e}")
+    extracted_text_service.delete(document)
     
     # Delete from database
+    share_service.invalidate_document(db, document.id)
     await db.delete(document)
     await db.commit()
     
@@ -241,12 +254,25 @@ async def list_tags(
 @router.get("/{document_id}/preview", response_model=DocumentPreviewResponse)
 async def preview_document(
     document_id: int,
+    request: Request,
+    response: Response,
     highlight_chunks: Optional[str] = None,  # Comma-separated list of chunk IDs to highlight
     chunk_scores: Optional[str] = None,  # Comma-separated list of chunk scores (format: "chunk_id:score,chunk_id:score")
+    start: Optional[int] = Query(None, ge=0),  # Character window start
+    length: Optional[int] = Query(None, gt=0),  # Character window length
+    page_from: Optional[int] = Query(None, ge=1),  # Page window (PDF only), resolved from chunk page numbers
+    page_to: Optional[int] = Query(None, ge=1),
+    around_highlights: bool = False,  # Only return a window around the highlighted chunks
+    context: int = Query(2000, ge=0),  # Characters of context around highlighted chunks
+    include_chunk_content: bool = False,  # Repeat each chunk's text (it is also in content[start:end])
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get a preview of document content with optional chunk highlighting and scores"""
+    """Get a preview of document content with optional windowing, chunk highlighting and scores.
+
+    Chunk start/end offsets are always relative to the full document text;
+    the returned content covers [window_start, window_end).
+    """
     result = await db.execute(
         select(Document)
         .options(selectinload(Document.chunks))
@@ -267,13 +293,29 @@ async def preview_document(
             detail="You don't have access to this document"
         )
     
-    # Read file content and extract text
     try:
-        # Download from MinIO
-        file_content = storage_service.download_file(document.file_path)
+        # The response only changes when the original file, the chunks or the
+        # query change, so answer conditional requests before loading any text
+        source_etag = (await run_in_threadpool(storage_service.stat_file, document.file_path)).etag
+        etag_source = ":".join([
+            str(document.id),
+            source_etag,
+            ",".join(f"{chunk.id}@{chunk.start_offset}" for chunk in document.chunks),
+            request.url.query
+        ])
+        etag = f'"{hashlib.sha256(etag_source.encode("utf-8")).hexdigest()[:32]}"'
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        ):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+            )
         
-        # Extract text from document
-        text = document_processor.process_document(file_content, document.file_type)
+        # Load the text extracted at ingest (rebuilt only if missing or the file changed)
+        text = await run_in_threadpool(extracted_text_service.get_or_build, document, source_etag)
         
         # Build chunk information with positions in the text
         chunks_info = []
@@ -306,8 +348,15 @@ async def preview_document(
         
         current_position = 0
         for chunk in sorted_chunks:
-            # Find the chunk content in the full text
-            chunk_start = text.find(chunk.content, current_position)
+            # Use the offsets stored at ingest; only search for chunks from
+            # before offsets were recorded or whose text no longer matches
+            if (
+                chunk.start_offset is not None
+                and text[chunk.start_offset:chunk.end_offset] == chunk.content
+            ):
+                chunk_start = chunk.start_offset
+            else:
+                chunk_start = text.find(chunk.content, current_position)
             if chunk_start >= 0:
                 chunk_end = chunk_start + len(chunk.content)
                 chunk_info = {
@@ -315,25 +364,72 @@ async def preview_document(
                     "chunk_index": chunk.chunk_index,
                     "start": chunk_start,
                     "end": chunk_end,
-                    "content": chunk.content,
+                    "page_start": chunk.page_start,
+                    "page_end": chunk.page_end,
+                    "heading_path": chunk.heading_path,
                     "highlighted": chunk.id in highlight_chunk_ids
                 }
+                if include_chunk_content:
+                    chunk_info["content"] = chunk.content
                 
                 # Add score if available
                 if chunk.id in chunk_score_map:
                     chunk_info["score"] = chunk_score_map[chunk.id]
                 
                 chunks_info.append(chunk_info)
-                current_position = chunk_end
+                # Chunks overlap, so the next one may start before this one ends
+                current_position = chunk_start + 1
+        
+        # Resolve the requested window
+        window_start, window_end = 0, len(text)
+        highlighted = [c for c in chunks_info if c["highlighted"]]
+        if around_highlights and highlighted:
+            window_start = max(0, min(c["start"] for c in highlighted) - context)
+            window_end = min(len(text), max(c["end"] for c in highlighted) + context)
+        elif page_from is not None or page_to is not None:
+            paged = [c for c in chunks_info if c["page_start"] is not None]
+            if not paged:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Page windows are not available for this document"
+                )
+            first_page = page_from or 1
+            last_page = page_to or max(c["page_end"] for c in paged)
+            in_pages = [
+                c for c in paged
+                if c["page_start"] <= last_page and c["page_end"] >= first_page
+            ]
+            if in_pages:
+                window_start = min(c["start"] for c in in_pages)
+                window_end = max(c["end"] for c in in_pages)
+            else:
+                window_start = window_end = 0
+        elif start is not None or length is not None:
+            window_start = min(start or 0, len(text))
+            window_end = len(text) if length is None else min(len(text), window_start + length)
+        
+        # Only return chunks that overlap the window
+        if (window_start, window_end) != (0, len(text)):
+            chunks_info = [
+                c for c in chunks_info
+                if c["end"] > window_start and c["start"] < window_end
+            ]
+        
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
         
         return DocumentPreviewResponse(
             document_id=document.id,
             original_filename=document.original_filename,
             file_type=document.file_type,
-            content=text,
+            content=text[window_start:window_end],
             preview_length=len(text),
+            window_start=window_start,
+            window_end=window_end,
             chunks=chunks_info
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -341,6 +437,92 @@ async def preview_document(
         )
 
 
+@router.get("/{document_id}/download")
+async def download_document(
+    document_id: int,
+    request: Request,
+    inline: bool = False,  # Content-Disposition inline (e.g. for PDF viewers) instead of attachment
+    presigned: bool = False,  # Return a short-lived MinIO URL instead of streaming through the API
+    redirect: bool = False,  # With presigned, answer 307 to the URL instead of returning it as JSON
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Download the original file, streamed from storage with HTTP Range support"""
+    has_permission = await share_service.check_permission(
+        db, document_id, current_user.id, "view"
+    )
+    if not has_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this document"
+        )
+    
+    result = await db.execute(select(Document).where(Document.id == document_id))
+    document = result.scalar_one()
+    
+    try:
+        stat = await run_in_threadpool(storage_service.stat_file, document.file_path)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found in storage: {str(e)}"
+        )
+    content_type = stat.content_type or "application/octet-stream"
+    
+    if presigned:
+        expires_in = settings.presigned_url_expire_seconds
+        url = storage_service.presigned_download_url(
+            document.file_path,
+            expires=timedelta(seconds=expires_in),
+            filename=document.original_filename,
+            content_type=content_type
+        )
+        if redirect:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+        return {"url": url, "expires_in": expires_in}
+    
+    etag = f'"{stat.etag}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": content_disposition(
+            "inline" if inline else "attachment", document.original_filename
+        ),
+    }
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # If-Range: only honour the range if the client's copy is still current
+    byte_range = None
+    if request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range_header(request.headers.get("range"), stat.size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{stat.size}"}
+            )
+    
+    if byte_range is None:
+        headers["Content-Length"] = str(stat.size)
+        return StreamingResponse(
+            storage_service.iter_file(document.file_path),
+            media_type=content_type,
+            headers=headers
+        )
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage_service.iter_file(document.file_path, offset=start, length=end - start + 1),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=content_type,
+        headers=headers
+    )
+
+
 # ========== Document Editing & Update ==========
 
 @router.put("/{document_id}", response_model=DocumentResponse)
@@ -387,6 +569,7 @@ async def update_document(
     if update_data.is_public is not None:
         if document.is_public != update_data.is_public:
             changes.append(f"Visibility changed to {update_data.is_public}")
+            share_service.invalidate_document(db, document.id)
         document.is_public = update_data.is_public
     
     # Update tags
@@ -494,6 +677,7 @@ async def rollback_to_version(
     
     # Perform rollback
     await version_service.rollback_to_version(db, document, version, current_user.id)
+    share_service.invalidate_document(db, document.id)
     
     await db.commit()
     await db.refresh(document)
@@ -637,8 +821,7 @@ async def track_document_view(
             detail="You don't have access to this document"
         )
     
-    await analytics_service.track_action(db, document_id, "view", current_user.id)
-    await db.commit()
+    await analytics_buffer.record(document_id, "view", current_user.id)
     
     return {"message": "View tracked"}
 
@@ -659,8 +842,7 @@ async def track_document_download(
             detail="You don't have access to this document"
         )
     
-    await analytics_service.track_action(db, document_id, "download", current_user.id)
-    await db.commit()
+    await analytics_buffer.record(document_id, "download", current_user.id)
     
     return {"message": "Download tracked"}
 
@@ -776,32 +958,30 @@ async def bulk_update_documents(
     updated_count = 0
     errors = []
     
+    editable_ids = await share_service.filter_permitted(
+        db, bulk_data.document_ids, current_user.id, "edit"
+    )
+    documents = {}
+    async for batch in document_service.iter_document_batches(db, editable_ids):
+        documents.update((document.id, document) for document in batch)
+    denied_ids = [doc_id for doc_id in bulk_data.document_ids if doc_id not in documents]
+    existing_ids = await document_service.existing_ids(db, denied_ids) if denied_ids else set()
+    
     for doc_id in bulk_data.document_ids:
         try:
-            # Check permission
-            has_permission = await share_service.check_permission(
-                db, doc_id, current_user.id, "edit"
-            )
-            if not has_permission:
-                errors.append({"document_id": doc_id, "error": "No edit permission"})
-                continue
-            
-            result = await db.execute(
-                select(Document)
-                .options(selectinload(Document.tags))
-                .where(Document.id == doc_id)
-            )
-            document = result.scalar_one_or_none()
-            
-            if not document:
-                errors.append({"document_id": doc_id, "error": "Not found"})
+            if doc_id not in documents:
+                error = "No edit permission" if doc_id in existing_ids else "Not found"
+                errors.append({"document_id": doc_id, "error": error})
                 continue
+            document = documents[doc_id]
             
             # Apply updates
             if bulk_data.updates.description is not None:
                 document.description = bulk_data.updates.description
             
             if bulk_data.updates.is_public is not None:
+                if document.is_public != bulk_data.updates.is_public:
+                    share_service.invalidate_document(db, document.id)
                 document.is_public = bulk_data.updates.is_public
             
             if bulk_data.updates.tags is not None:
@@ -854,13 +1034,13 @@ async def bulk_share_documents(
             detail="User not found"
         )
     
+    shareable_ids = set(await share_service.filter_permitted(
+        db, bulk_data.document_ids, current_user.id, "admin"
+    ))
+    
     for doc_id in bulk_data.document_ids:
         try:
-            # Check permission
-            has_permission = await share_service.check_permission(
-                db, doc_id, current_user.id, "admin"
-            )
-            if not has_permission:
+            if doc_id not in shareable_ids:
                 errors.append({"document_id": doc_id, "error": "No admin permission"})
                 continue
             
@@ -882,6 +1062,17 @@ async def bulk_share_documents(
 
 # ========== Export ==========
 
+async def _accessible_export_ids(db: AsyncSession, document_ids: List[int], user_id: int) -> List[int]:
+    """Requested ids the user can view, resolved in bulk; 403 if there are none"""
+    accessible_docs = await share_service.filter_permitted(db, document_ids, user_id, "view")
+    if not accessible_docs:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No accessible documents to export"
+        )
+    return accessible_docs
+
+
 @router.post("/export/json")
 async def export_documents_json(
     export_data: ExportRequest,
@@ -889,27 +1080,13 @@ async def export_documents_json(
     db: AsyncSession = Depends(get_db)
 ):
     """Export documents as JSON"""
-    # Verify access to all documents
-    accessible_docs = []
-    for doc_id in export_data.document_ids:
-        has_permission = await share_service.check_permission(
-            db, doc_id, current_user.id, "view"
-        )
-        if has_permission:
-            accessible_docs.append(doc_id)
-    
-    if not accessible_docs:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No accessible documents to export"
-        )
-    
-    documents = await export_service.export_documents_json(db, accessible_docs)
+    accessible_docs = await _accessible_export_ids(db, export_data.document_ids, current_user.id)
     
-    return {
-        "documents": documents,
-        "count": len(documents)
-    }
+    # Same shape as before ({"documents": [...], "count": n}), streamed as documents load
+    return StreamingResponse(
+        export_service.stream_metadata(db, "json", accessible_docs),
+        media_type="application/json"
+    )
 
 
 @router.post("/export/zip")
@@ -919,30 +1096,16 @@ async def export_documents_zip(
     db: AsyncSession = Depends(get_db)
 ):
     """Export documents as ZIP file"""
-    # Verify access to all documents
-    accessible_docs = []
-    for doc_id in export_data.document_ids:
-        has_permission = await share_service.check_permission(
-            db, doc_id, current_user.id, "view"
-        )
-        if has_permission:
-            accessible_docs.append(doc_id)
+    accessible_docs = await _accessible_export_ids(db, export_data.document_ids, current_user.id)
     
-    if not accessible_docs:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No accessible documents to export"
-        )
-    
-    zip_content, filename = await export_service.export_documents_zip(db, accessible_docs)
+    zip_stream, filename = await export_service.export_documents_zip(db, accessible_docs)
     
     # Track downloads
     for doc_id in accessible_docs:
-        await analytics_service.track_action(db, doc_id, "download", current_user.id)
-    await db.commit()
+        await analytics_buffer.record(doc_id, "download", current_user.id)
     
     return StreamingResponse(
-        io.BytesIO(zip_content),
+        zip_stream,
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -955,25 +1118,126 @@ async def export_documents_csv(
     db: AsyncSession = Depends(get_db)
 ):
     """Export document metadata as CSV"""
-    # Verify access to all documents
-    accessible_docs = []
-    for doc_id in export_data.document_ids:
-        has_permission = await share_service.check_permission(
-            db, doc_id, current_user.id, "view"
-        )
-        if has_permission:
-            accessible_docs.append(doc_id)
+    accessible_docs = await _accessible_export_ids(db, export_data.document_ids, current_user.id)
     
-    if not accessible_docs:
+    media_type, filename = EXPORT_FORMATS["csv"]
+    return StreamingResponse(
+        export_service.stream_metadata(db, "csv", accessible_docs),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.post("/export/ndjson")
+async def export_documents_ndjson(
+    export_data: ExportRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Export document metadata as newline-delimited JSON (one document per line)"""
+    accessible_docs = await _accessible_export_ids(db, export_data.document_ids, current_user.id)
+    
+    media_type, filename = EXPORT_FORMATS["ndjson"]
+    return StreamingResponse(
+        export_service.stream_metadata(db, "ndjson", accessible_docs),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+# ========== Export Jobs ==========
+
+def _export_job_response(job: ExportJob) -> ExportJobResponse:
+    response = ExportJobResponse.model_validate(job)
+    if job.total_documents:
+        response.progress = min(job.processed_documents / job.total_documents, 1.0)
+    if job.status == "completed":
+        response.progress = 1.0
+        response.download_url = storage_service.presigned_download_url(
+            job.object_name,
+            expires=timedelta(seconds=settings.presigned_url_expire_seconds),
+            filename=EXPORT_FORMATS[job.format][1],
+            content_type=EXPORT_FORMATS[job.format][0]
+        )
+    return response
+
+
+async def _get_own_export_job(db: AsyncSession, job_id: str, user_id: int) -> ExportJob:
+    result = await db.execute(select(ExportJob).where(ExportJob.id == job_id))
+    job = result.scalar_one_or_none()
+    if not job or job.user_id != user_id:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No accessible documents to export"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    return job
+
+
+@router.post("/export/jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    export_data: ExportJobCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Queue an export to run in the background; poll the job for progress and a download link"""
+    if export_data.format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}"
         )
     
-    csv_content, filename = await export_service.export_documents_metadata_csv(db, accessible_docs)
+    accessible_docs = await _accessible_export_ids(db, export_data.document_ids, current_user.id)
     
-    return Response(
-        content=csv_content,
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    job = ExportJob(
+        id=str(uuid.uuid4()),
+        user_id=current_user.id,
+        format=export_data.format,
+        document_ids=accessible_docs,
+        status="pending",
+        total_documents=len(accessible_docs),
+        processed_documents=0
     )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    
+    export_documents_task.delay(job.id)
+    
+    return _export_job_response(job)
+
+
+@router.get("/export/jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get an export job's status and progress (with a download link once completed)"""
+    job = await _get_own_export_job(db, job_id, current_user.id)
+    return _export_job_response(job)
+
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a finished export through the API (alternative to the presigned download_url)"""
+    job = await _get_own_export_job(db, job_id, current_user.id)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export job is {job.status}"
+        )
+    
+    media_type, filename = EXPORT_FORMATS[job.format]
+    headers = {"Content-Disposition": content_disposition("attachment", filename)}
+    if job.file_size is not None:
+        headers["Content-Length"] = str(job.file_size)
+    return StreamingResponse(
+        storage_service.iter_file(job.object_name),
+        media_type=media_type,
+        headers=headers
+    )
+
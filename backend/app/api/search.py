@@ -62,7 +62,12 @@ async def semantic_search(
             "chunk_id": chunk.id,
             "chunk_index": chunk_index,
             "chunk_content": result["payload"]["document"],
-            "score": result["score"]
+            "score": result["score"],
+            "start_offset": chunk.start_offset,
+            "end_offset": chunk.end_offset,
+            "page_start": chunk.page_start,
+            "page_end": chunk.page_end,
+            "heading_path": chunk.heading_path
         })
     
     # Fetch document details and create search results
@@ -92,7 +97,12 @@ async def semantic_search(
                 chunk_id=chunk["chunk_id"],
                 chunk_index=chunk["chunk_index"],
                 chunk_content=chunk["chunk_content"],
-                score=chunk["score"]
+                score=chunk["score"],
+                start_offset=chunk["start_offset"],
+                end_offset=chunk["end_offset"],
+                page_start=chunk["page_start"],
+                page_end=chunk["page_end"],
+                heading_path=chunk["heading_path"]
             )
             for chunk in sorted_chunks
         ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Table, Float, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Table, Float, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -21,6 +21,7 @@ class Document(Base):
     file_type = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)
+    content_hash = Column(String, nullable=True)  # SHA-256 of the original file, computed on upload
     upload_date = Column(DateTime, default=datetime.utcnow)
     owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     description = Column(Text, nullable=True)
@@ -38,6 +39,7 @@ class Document(Base):
     versions = relationship("DocumentVersion", back_populates="document", cascade="all, delete-orphan")
     shares = relationship("DocumentShare", back_populates="document", cascade="all, delete-orphan")
     analytics = relationship("DocumentAnalytics", back_populates="document", cascade="all, delete-orphan")
+    analytics_rollups = relationship("AnalyticsDailyRollup", cascade="all, delete-orphan")
     favorites = relationship("DocumentFavorite", back_populates="document", cascade="all, delete-orphan")
 
 
@@ -49,6 +51,14 @@ class DocumentChunk(Base):
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
     qdrant_point_id = Column(String, nullable=False, unique=True)
+    # Position of the chunk in the extracted text, captured at ingest
+    start_offset = Column(Integer, nullable=True)
+    end_offset = Column(Integer, nullable=True)
+    # Source pages (1-based, PDF only)
+    page_start = Column(Integer, nullable=True)
+    page_end = Column(Integer, nullable=True)
+    # Headings above the chunk, outermost first (Markdown/DOCX only)
+    heading_path = Column(JSON, nullable=True)
     
     document = relationship("Document", back_populates="chunks")
 
@@ -122,6 +132,42 @@ class DocumentAnalytics(Base):
     
     document = relationship("Document", back_populates="analytics")
     user = relationship("User", foreign_keys=[user_id])
+    
+    __table_args__ = (
+        # Per-document stats scan by action and time range; user_id makes the
+        # unique viewer count an index-only scan
+        Index(
+            "ix_document_analytics_document_action_timestamp_user",
+            "document_id", "action", "timestamp", "user_id"
+        ),
+        Index("ix_document_analytics_user_timestamp", "user_id", "timestamp"),
+    )
+
+
+class AnalyticsDailyRollup(Base):
+    __tablename__ = "analytics_daily_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), nullable=False)
+    action = Column(String, nullable=False)  # view, download, search_hit
+    day = Column(Date, nullable=False)  # UTC day
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("document_id", "action", "day", name="uq_analytics_daily_rollup"),
+        Index("ix_analytics_daily_rollups_day", "day"),
+    )
+
+
+class AnalyticsRollupState(Base):
+    """Single-row watermark of rollup_analytics_task"""
+    __tablename__ = "analytics_rollup_state"
+    
+    id = Column(Integer, primary_key=True)  # Always 1
+    rolled_until = Column(Date, nullable=False)  # Last UTC day in analytics_daily_rollups (even if it had no events)
+    last_event_id = Column(Integer, nullable=False, default=0)  # Highest document_analytics.id seen by the last run
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class DocumentFavorite(Base):
@@ -134,3 +180,22 @@ class DocumentFavorite(Base):
     
     document = relationship("Document", back_populates="favorites")
     user = relationship("User", back_populates="favorites")
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+    
+    id = Column(String, primary_key=True)  # UUID
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    format = Column(String, nullable=False)  # zip, json, csv, ndjson
+    document_ids = Column(JSON, nullable=False)  # Accessible documents at request time
+    status = Column(String, default="pending")  # pending, running, completed, failed, expired
+    total_documents = Column(Integer, nullable=False, default=0)
+    processed_documents = Column(Integer, nullable=False, default=0)
+    object_name = Column(String, nullable=True)  # Result in MinIO
+    file_size = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    
+    user = relationship("User", foreign_keys=[user_id])
@@ -60,6 +60,7 @@ class DocumentResponse(BaseModel):
     original_filename: str
     file_type: str
     file_size: int
+    content_hash: Optional[str] = None
     upload_date: datetime
     owner_id: int
     description: Optional[str]
@@ -85,6 +86,11 @@ class ChunkMatch(BaseModel):
     chunk_index: int
     chunk_content: str
     score: float
+    start_offset: Optional[int] = None
+    end_offset: Optional[int] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    heading_path: Optional[List[str]] = None
 
 
 class SearchResult(BaseModel):
@@ -110,9 +116,11 @@ class DocumentPreviewResponse(BaseModel):
     document_id: int
     original_filename: str
     file_type: str
-    content: str
-    preview_length: int
-    chunks: Optional[List[Dict[str, Any]]] = None  # List of chunks with their positions
+    content: str  # Text of the requested window
+    preview_length: int  # Length of the full document text
+    window_start: int = 0  # Offset of content within the full text
+    window_end: Optional[int] = None
+    chunks: Optional[List[Dict[str, Any]]] = None  # List of chunks with their positions in the full text
 
 
 # Version schemas
@@ -201,6 +209,28 @@ class ExportRequest(BaseModel):
     format: str  # pdf, docx, json
 
 
+class ExportJobCreate(BaseModel):
+    document_ids: List[int]
+    format: str = "zip"  # zip, json, csv, ndjson
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    format: str
+    status: str  # pending, running, completed, failed, expired
+    total_documents: int
+    processed_documents: int
+    progress: float = 0.0  # 0-1
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    download_url: Optional[str] = None  # Presigned URL once completed
+    
+    class Config:
+        from_attributes = True
+
+
 # Clustering schemas
 class ClusterRequest(BaseModel):
     algorithm: str = "kmeans"  # kmeans, hdbscan
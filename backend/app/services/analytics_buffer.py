@@ -0,0 +1,209 @@
+"""
+Buffered analytics event ingestion
+
+Views and downloads are recorded in memory and written in batched inserts
+by a background task, every analytics_flush_interval seconds or as soon as
+analytics_batch_size events are waiting, instead of one INSERT inside each
+request. The buffer is flushed on shutdown.
+
+With analytics_redis_spool enabled, events are pushed to a Redis list
+instead, and whichever API worker holds the flush lock drains it, so
+several workers share a single writer and events survive a worker
+restart.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.models.models import DocumentAnalytics
+from config import settings
+from database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsBuffer:
+    """Collects analytics events and writes them to the database in batches"""
+
+    SPOOL_KEY = "analytics:events"
+    LOCK_KEY = "analytics:flush-lock"
+
+    def __init__(
+        self,
+        flush_interval: float,
+        batch_size: int,
+        max_pending: int,
+        redis_url: Optional[str] = None
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            flush_interval: Seconds between periodic flushes
+            batch_size: Events that trigger an early flush, and rows per INSERT
+            max_pending: Events kept in memory when writes fail; the oldest
+                are dropped beyond this
+            redis_url: Spool events through this Redis instead of memory
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.redis_url = redis_url
+        self._events: List[Dict[str, Any]] = []
+        self._redis = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+
+    async def start(self) -> None:
+        """Start the background flush loop (call from the app lifespan)"""
+        if self.redis_url:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(self.redis_url)
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def record(
+        self,
+        document_id: int,
+        action: str,
+        user_id: Optional[int] = None,
+        action_metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Queue a document action (view, download, search_hit) for the next flush"""
+        event = {
+            "document_id": document_id,
+            "user_id": user_id,
+            "action": action,
+            "action_metadata": action_metadata,
+            "timestamp": datetime.utcnow(),
+        }
+        self.recorded += 1
+        if self._redis is not None:
+            event["timestamp"] = event["timestamp"].isoformat()
+            pending = await self._redis.rpush(self.SPOOL_KEY, json.dumps(event))
+        else:
+            self._events.append(event)
+            pending = len(self._events)
+        if pending >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Analytics flush failed: {e}")
+
+    async def flush(self) -> int:
+        """Write all buffered events in batched inserts; returns how many were written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if self._redis is not None:
+                return await self._flush_spool()
+            if not self._events:
+                return 0
+            events, self._events = self._events, []
+            try:
+                await self._write(events)
+            except Exception:
+                # Keep the events for the next flush, dropping the oldest beyond max_pending
+                self._events = events + self._events
+                overflow = len(self._events) - self.max_pending
+                if overflow > 0:
+                    del self._events[:overflow]
+                    self.dropped += overflow
+                    logger.warning(f"Dropped {overflow} analytics events after failed writes")
+                raise
+            return len(events)
+
+    async def _flush_spool(self) -> int:
+        # One writer at a time across workers; the others skip this round
+        lock = self._redis.lock(self.LOCK_KEY, timeout=max(self.flush_interval * 10, 30))
+        if not await lock.acquire(blocking=False):
+            return 0
+        written = 0
+        try:
+            while True:
+                raw_events = await self._redis.lpop(self.SPOOL_KEY, self.batch_size)
+                if not raw_events:
+                    break
+                events = [json.loads(raw) for raw in raw_events]
+                for event in events:
+                    event["timestamp"] = datetime.fromisoformat(event["timestamp"])
+                try:
+                    await self._write(events)
+                except Exception:
+                    # Put them back at the head of the list, in order
+                    await self._redis.lpush(self.SPOOL_KEY, *reversed(raw_events))
+                    raise
+                written += len(events)
+        finally:
+            await lock.release()
+        return written
+
+    async def _write(self, events: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            async with async_session_maker() as session:
+                for batch_start in range(0, len(events), self.batch_size):
+                    await session.execute(
+                        insert(DocumentAnalytics),
+                        events[batch_start:batch_start + self.batch_size]
+                    )
+                await session.commit()
+        except Exception:
+            self.failed_flushes += 1
+            raise
+        self.last_flush_seconds = time.perf_counter() - started
+        self.written += len(events)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "spool": "redis" if self.redis_url else "memory",
+            "pending": len(self._events),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+
+analytics_buffer = AnalyticsBuffer(
+    flush_interval=settings.analytics_flush_interval,
+    batch_size=settings.analytics_batch_size,
+    max_pending=settings.analytics_max_pending,
+    redis_url=settings.redis_url if settings.analytics_redis_spool else None
+)
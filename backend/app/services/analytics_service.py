@@ -1,12 +1,24 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from app.models.models import DocumentAnalytics, Document
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from sqlalchemy import select, func, or_, union_all
+from app.models.models import DocumentAnalytics, Document, AnalyticsDailyRollup, AnalyticsRollupState
+from app.utils.ttl_cache import TTLCache, MISSING
+from collections import Counter
+from typing import Optional, Dict, Any, Tuple
+from datetime import date, datetime, time, timedelta
 
 
 class AnalyticsService:
-    """Service for tracking and reporting document analytics"""
+    """
+    Service for tracking and reporting document analytics.
+    
+    Reports cover whole UTC days: days up to the rollup watermark (the last
+    day rolled up by rollup_analytics_task, kept in analytics_rollup_state)
+    are read from analytics_daily_rollups, and later events from the raw table.
+    """
+    
+    def __init__(self):
+        # The watermark only moves when the rollup task runs
+        self._watermark_cache = TTLCache(max_entries=1, ttl=60)
     
     async def track_action(
         self,
@@ -27,6 +39,34 @@ class AnalyticsService:
         await db.flush()
         return analytics
     
+    async def _rollup_watermark(self, db: AsyncSession) -> Optional[date]:
+        """Last day covered by analytics_daily_rollups, or None before the first rollup"""
+        watermark = self._watermark_cache.get("watermark")
+        if watermark is MISSING:
+            result = await db.execute(
+                select(AnalyticsRollupState.rolled_until).where(AnalyticsRollupState.id == 1)
+            )
+            watermark = result.scalar()
+            self._watermark_cache.set("watermark", watermark)
+        return watermark
+    
+    async def _split_period(
+        self,
+        db: AsyncSession,
+        days: int
+    ) -> Tuple[date, Optional[date], datetime]:
+        """
+        Split the reporting period into rolled-up days and raw events.
+        
+        Returns:
+            (first day, last rolled-up day to read or None, start of raw events)
+        """
+        start_day = (datetime.utcnow() - timedelta(days=days)).date()
+        watermark = await self._rollup_watermark(db)
+        if watermark is None or watermark < start_day:
+            return start_day, None, datetime.combine(start_day, time.min)
+        return start_day, watermark, datetime.combine(watermark + timedelta(days=1), time.min)
+    
     async def get_document_stats(
         self,
         db: AsyncSession,
@@ -34,48 +74,41 @@ class AnalyticsService:
         days: int = 30
     ) -> Dict[str, Any]:
         """Get comprehensive statistics for a document"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Total views
-        result = await db.execute(
-            select(func.count(DocumentAnalytics.id))
-            .where(
-                DocumentAnalytics.document_id == document_id,
-                DocumentAnalytics.action == "view",
-                DocumentAnalytics.timestamp >= cutoff_date
-            )
-        )
-        total_views = result.scalar() or 0
+        start_day, rolled_until, raw_from = await self._split_period(db, days)
         
-        # Total downloads
-        result = await db.execute(
-            select(func.count(DocumentAnalytics.id))
-            .where(
-                DocumentAnalytics.document_id == document_id,
-                DocumentAnalytics.action == "download",
-                DocumentAnalytics.timestamp >= cutoff_date
+        # Action counts: rolled-up days plus raw events since the watermark
+        counts = Counter()
+        if rolled_until is not None:
+            result = await db.execute(
+                select(AnalyticsDailyRollup.action, func.sum(AnalyticsDailyRollup.count))
+                .where(
+                    AnalyticsDailyRollup.document_id == document_id,
+                    AnalyticsDailyRollup.day >= start_day,
+                    AnalyticsDailyRollup.day <= rolled_until
+                )
+                .group_by(AnalyticsDailyRollup.action)
             )
-        )
-        total_downloads = result.scalar() or 0
+            counts.update({action: total or 0 for action, total in result.all()})
         
-        # Total search hits
         result = await db.execute(
-            select(func.count(DocumentAnalytics.id))
+            select(DocumentAnalytics.action, func.count(DocumentAnalytics.id))
             .where(
                 DocumentAnalytics.document_id == document_id,
-                DocumentAnalytics.action == "search_hit",
-                DocumentAnalytics.timestamp >= cutoff_date
+                DocumentAnalytics.timestamp >= raw_from
             )
+            .group_by(DocumentAnalytics.action)
         )
-        total_search_hits = result.scalar() or 0
+        counts.update(dict(result.all()))
         
-        # Unique viewers
+        # Unique viewers over the whole period come from the raw table, since
+        # daily unique counts cannot be summed; the composite index covers this
+        # query
         result = await db.execute(
             select(func.count(func.distinct(DocumentAnalytics.user_id)))
             .where(
                 DocumentAnalytics.document_id == document_id,
                 DocumentAnalytics.action == "view",
-                DocumentAnalytics.timestamp >= cutoff_date,
+                DocumentAnalytics.timestamp >= datetime.combine(start_day, time.min),
                 DocumentAnalytics.user_id.isnot(None)
             )
         )
@@ -92,9 +125,9 @@ class AnalyticsService:
         
         return {
             "document_id": document_id,
-            "total_views": total_views,
-            "total_downloads": total_downloads,
-            "total_search_hits": total_search_hits,
+            "total_views": counts["view"],
+            "total_downloads": counts["download"],
+            "total_search_hits": counts["search_hit"],
             "unique_viewers": unique_viewers,
             "recent_views": recent_views,
             "period_days": days
@@ -108,48 +141,53 @@ class AnalyticsService:
         user_id: Optional[int] = None
     ) -> list[Dict[str, Any]]:
         """Get most popular documents by view count"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        start_day, rolled_until, raw_from = await self._split_period(db, days)
         
-        query = (
+        # Views per document: rolled-up days plus raw events since the watermark,
+        # ranked in SQL so only the top rows are returned
+        view_sources = [
             select(
-                DocumentAnalytics.document_id,
-                func.count(DocumentAnalytics.id).label('view_count')
+                DocumentAnalytics.document_id.label("document_id"),
+                func.count(DocumentAnalytics.id).label("views")
             )
             .where(
                 DocumentAnalytics.action == "view",
-                DocumentAnalytics.timestamp >= cutoff_date
+                DocumentAnalytics.timestamp >= raw_from
             )
             .group_by(DocumentAnalytics.document_id)
-            .order_by(func.count(DocumentAnalytics.id).desc())
-            .limit(limit)
+        ]
+        if rolled_until is not None:
+            view_sources.append(
+                select(
+                    AnalyticsDailyRollup.document_id.label("document_id"),
+                    func.sum(AnalyticsDailyRollup.count).label("views")
+                )
+                .where(
+                    AnalyticsDailyRollup.action == "view",
+                    AnalyticsDailyRollup.day >= start_day,
+                    AnalyticsDailyRollup.day <= rolled_until
+                )
+                .group_by(AnalyticsDailyRollup.document_id)
+            )
+        views = (union_all(*view_sources) if len(view_sources) > 1 else view_sources[0]).subquery()
+        totals = (
+            select(views.c.document_id, func.sum(views.c.views).label("view_count"))
+            .group_by(views.c.document_id)
+            .subquery()
         )
         
-        result = await db.execute(query)
-        popular = result.all()
-        
-        # Get document details
-        popular_docs = []
-        for doc_id, view_count in popular:
-            result = await db.execute(
-                select(Document)
-                .where(Document.id == doc_id)
-            )
-            doc = result.scalar_one_or_none()
-            if doc:
-                # Check if user has access
-                if user_id:
-                    if doc.owner_id == user_id or doc.is_public == "public":
-                        popular_docs.append({
-                            "document": doc,
-                            "view_count": view_count
-                        })
-                else:
-                    popular_docs.append({
-                        "document": doc,
-                        "view_count": view_count
-                    })
+        query = select(Document, totals.c.view_count).join(totals, totals.c.document_id == Document.id)
+        if user_id:
+            # Only documents the user owns or that are public
+            query = query.where(or_(Document.owner_id == user_id, Document.is_public == "public"))
+        result = await db.execute(
+            query.order_by(totals.c.view_count.desc(), Document.id).limit(limit)
+        )
         
-        return popular_docs
+        return [
+            {"document": doc, "view_count": view_count}
+            for doc, view_count in result.all()
+        ]
     
     async def get_user_activity(
         self,
@@ -157,47 +195,37 @@ class AnalyticsService:
         user_id: int,
         days: int = 30
     ) -> Dict[str, Any]:
-        """Get user's document activity statistics"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        """
+        Get user's document activity statistics.
         
-        # Total actions
-        result = await db.execute(
-            select(func.count(DocumentAnalytics.id))
-            .where(
-                DocumentAnalytics.user_id == user_id,
-                DocumentAnalytics.timestamp >= cutoff_date
-            )
-        )
-        total_actions = result.scalar() or 0
+        Rollups are per document, not per user, so this reads raw events: one
+        pass over the (user_id, timestamp) index, grouped by action and document.
+        """
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # Actions by type
         result = await db.execute(
             select(
                 DocumentAnalytics.action,
-                func.count(DocumentAnalytics.id).label('count')
-            )
-            .where(
-                DocumentAnalytics.user_id == user_id,
-                DocumentAnalytics.timestamp >= cutoff_date
+                DocumentAnalytics.document_id,
+                func.count(DocumentAnalytics.id)
             )
-            .group_by(DocumentAnalytics.action)
-        )
-        actions_by_type = {row[0]: row[1] for row in result.all()}
-        
-        # Unique documents accessed
-        result = await db.execute(
-            select(func.count(func.distinct(DocumentAnalytics.document_id)))
             .where(
                 DocumentAnalytics.user_id == user_id,
                 DocumentAnalytics.timestamp >= cutoff_date
             )
+            .group_by(DocumentAnalytics.action, DocumentAnalytics.document_id)
         )
-        unique_documents = result.scalar() or 0
+        actions_by_type = Counter()
+        documents = set()
+        for action, document_id, count in result.all():
+            actions_by_type[action] += count
+            documents.add(document_id)
+        unique_documents = len(documents)
         
         return {
             "user_id": user_id,
-            "total_actions": total_actions,
-            "actions_by_type": actions_by_type,
+            "total_actions": sum(actions_by_type.values()),
+            "actions_by_type": dict(actions_by_type),
             "unique_documents": unique_documents,
             "period_days": days
         }
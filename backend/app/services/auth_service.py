@@ -5,15 +5,24 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, event, inspect
+from sqlalchemy.orm import make_transient_to_detached
 from config import settings
 from app.models.models import User
 from app.schemas.schemas import TokenData
+from app.utils.ttl_cache import TTLCache, MISSING
+from app.utils.bounded_pool import BoundedThreadPool
 from database import get_db
+import time
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Decoded token subjects, keyed by the raw token (entries never outlive the token's exp)
+token_cache = TTLCache(settings.auth_cache_max_entries, settings.auth_cache_ttl)
+# Column values of users, keyed by username (the token subject)
+user_cache = TTLCache(settings.auth_cache_max_entries, settings.auth_cache_ttl)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,6 +32,22 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# bcrypt takes ~200ms of CPU per call; async handlers run it here instead of on the event loop
+password_pool = BoundedThreadPool(
+    "bcrypt", settings.password_hash_workers, settings.password_hash_max_pending
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password pool (raises PoolBusyError when it is saturated)"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the password pool (raises PoolBusyError when it is saturated)"""
+    return await password_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -34,6 +59,38 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def invalidate_cached_user(username: str) -> None:
+    """Drop a user from the cache so the next request reloads it"""
+    user_cache.invalidate(username)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User):
+    # Covers changes made through the ORM in this process; other processes
+    # pick them up when their entry expires
+    invalidate_cached_user(target.username)
+    history = inspect(target).attrs.username.history
+    for username in history.deleted or ():
+        invalidate_cached_user(username)
+
+
+def _decode_token_subject(token: str) -> Optional[str]:
+    """Username (sub) of a valid token, or None; valid tokens are cached until they expire"""
+    username = token_cache.get(token)
+    if username is not MISSING:
+        return username
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if username is not None:
+        exp = payload.get("exp")
+        token_cache.set(token, username, ttl=exp - time.time() if exp is not None else None)
+    return username
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -43,18 +100,24 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
+    username = _decode_token_subject(token)
+    if username is None:
         raise credentials_exception
+    token_data = TokenData(username=username)
+    
+    cached = user_cache.get(token_data.username)
+    if cached is not MISSING:
+        # Attach a copy to this request's session without querying
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
     
     result = await db.execute(select(User).where(User.username == token_data.username))
     user = result.scalar_one_or_none()
     
     if user is None:
         raise credentials_exception
+    user_cache.set(user.username, {
+        attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs
+    })
     return user
@@ -1,72 +1,181 @@
 from pypdf import PdfReader
-from docx import Document as DocxDocument
-from app.utils.text_splitter import RecursiveCharacterTextSplitter
+from app.utils.text_splitter import OffsetTrackingTextSplitter
+from app.utils.token_counter import TokenCounter
+from app.utils.structured_chunker import StructuredChunker, TextBlock, TextChunk
+from app.utils import docx_stream
 from app.services.ocr_service import ocr_service
-from typing import List
+from config import settings
+from typing import Callable, Iterator, List, Optional, Tuple
+from bisect import bisect_right
 import io
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# ATX headings ("## Title ##"), list items and code fences in Markdown
+MD_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+MD_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s")
+MD_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+STRUCTURED_FILE_TYPES = ("md", "docx", "doc")
+
 
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-        )
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        chunking_mode: Optional[str] = None
+    ):
+        self.chunk_size = chunk_size if chunk_size is not None else settings.chunk_size
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.chunk_overlap
+        self.chunking_mode = chunking_mode or settings.chunking_mode
+        self._text_splitter = None
+        self._token_counter = None
+        self._max_seq_length = None
     
-    def extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file. Tries pypdf first, falls back to OCR if text is sparse."""
-        pdf_file = io.BytesIO(file_content)
-        reader = PdfReader(pdf_file)
+    def _load_tokenizer(self):
+        """Use the embedding model's tokenizer (loaded lazily, only when tokens are needed)"""
+        if self._token_counter is None:
+            from app.services.qdrant_service import qdrant_service
+            if qdrant_service.tokenizer is not None:
+                self._token_counter = TokenCounter(qdrant_service.tokenizer)
+                self._max_seq_length = qdrant_service.max_seq_length
+        return self._token_counter
+    
+    @property
+    def text_splitter(self) -> OffsetTrackingTextSplitter:
+        if self._text_splitter is None:
+            token_counter = self._load_tokenizer() if self.chunking_mode == "tokens" else None
+            if self.chunking_mode == "tokens" and token_counter is None:
+                logger.warning("Token chunking needs a sentence-transformers model; falling back to characters")
+            
+            if token_counter is not None:
+                # Leave room for the [CLS]/[SEP] tokens the model adds
+                chunk_size = self.chunk_size or self._max_seq_length - token_counter.num_special_tokens()
+                chunk_overlap = self.chunk_overlap if self.chunk_overlap is not None else chunk_size // 5
+                length_function = token_counter
+            else:
+                chunk_size = self.chunk_size or 1000
+                chunk_overlap = self.chunk_overlap if self.chunk_overlap is not None else 200
+                length_function = len
+            
+            self._text_splitter = OffsetTrackingTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=length_function,
+            )
+        return self._text_splitter
+    
+    @staticmethod
+    def _as_stream(file_content):
+        """Seekable stream over file content; memory-mapped views (see StorageService.open_file) are used as-is"""
+        if hasattr(file_content, "seekable"):
+            file_content.seek(0)
+            return file_content
+        return io.BytesIO(file_content)
+    
+    def extract_pdf_pages(self, file_content: bytes) -> List[str]:
+        """Extract text per PDF page. Tries pypdf first, falls back to OCR for pages with sparse text."""
+        reader = PdfReader(self._as_stream(file_content))
+        
+        page_texts = [page.extract_text() or "" for page in reader.pages]
         
-        text = ""
-        page_count = 0
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-            page_count += 1
+        # Heuristic: a page with fewer than ocr_min_page_chars characters of
+        # embedded text is most likely scanned, so only those pages are OCR'd
+        sparse_pages = [
+            page_number
+            for page_number, page_text in enumerate(page_texts, 1)
+            if len(page_text.strip()) < settings.ocr_min_page_chars
+        ]
         
-        # Heuristic: If text is very short relative to page count, it might be a scanned PDF
-        # Assuming an average page has at least 50 characters of text
-        if len(text.strip()) < (page_count * 50) and ocr_service.is_configured():
-            logger.info("PDF text extraction yielded low content. Attempting OCR...")
+        if sparse_pages and ocr_service.is_configured():
+            logger.info(
+                f"PDF text extraction yielded low content on {len(sparse_pages)}/{len(page_texts)} pages. "
+                "Attempting OCR on those pages..."
+            )
             try:
-                ocr_text = ocr_service.extract_text_from_pdf(file_content)
-                if len(ocr_text) > len(text):
-                    logger.info("OCR extraction successful and yielded more text.")
-                    return ocr_text
+                ocr_texts = ocr_service.extract_text_from_pdf_pages(file_content, sparse_pages)
+                for page_number, ocr_text in ocr_texts.items():
+                    if ocr_text and len(ocr_text) > len(page_texts[page_number - 1]):
+                        page_texts[page_number - 1] = ocr_text
             except Exception as e:
                 logger.error(f"OCR fallback failed: {e}")
                 # Fall back to original text if OCR fails
         
+        return page_texts
+    
+    @staticmethod
+    def _join_pages(page_texts: List[str]) -> Tuple[str, List[Tuple[int, int]]]:
+        """Join page texts, returning the text and (page_number, start_offset) for each non-empty page"""
+        parts = []
+        page_starts = []
+        offset = 0
+        for page_number, page_text in enumerate(page_texts, 1):
+            if not page_text:
+                continue
+            page_starts.append((page_number, offset))
+            parts.append(page_text + "\n")
+            offset += len(page_text) + 1
+        return "".join(parts), page_starts
+    
+    def extract_text_from_pdf(self, file_content: bytes) -> str:
+        """Extract text from PDF file"""
+        text, _ = self._join_pages(self.extract_pdf_pages(file_content))
         return text
     
+    def iter_docx_blocks(self, file_content: bytes) -> Iterator[TextBlock]:
+        """Yield headings, paragraphs, list items and table rows of a DOCX file in document order"""
+        return docx_stream.iter_docx_blocks(self._as_stream(file_content))
+    
     def extract_text_from_docx(self, file_content: bytes) -> str:
-        """Extract text from DOCX file"""
-        docx_file = io.BytesIO(file_content)
-        doc = DocxDocument(docx_file)
-        
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        return text
+        """Extract text from DOCX file (paragraphs and table rows)"""
+        return "\n".join(block.text for block in self.iter_docx_blocks(file_content))
     
     def extract_text_from_md(self, file_content: bytes) -> str:
         """Extract text from MD file"""
         try:
             # Try to decode as UTF-8 first
-            text = file_content.decode('utf-8')
+            text = str(file_content, 'utf-8')
         except UnicodeDecodeError:
             # Fallback to latin-1 if UTF-8 fails
-            text = file_content.decode('latin-1')
+            text = str(file_content, 'latin-1')
         
         return text
     
+    def iter_md_blocks(self, file_content: bytes) -> Iterator[TextBlock]:
+        """
+        Yield the lines of a Markdown file as blocks, marking ATX headings and list items.
+        
+        Lines joined with "\n" give back extract_text_from_md exactly, so chunk
+        offsets line up with the stored text. Headings inside code fences are ignored.
+        """
+        fence = None
+        for line in self.extract_text_from_md(file_content).split("\n"):
+            fence_match = MD_FENCE.match(line)
+            if fence_match:
+                marker = fence_match.group(1)
+                if fence is None:
+                    fence = marker
+                elif marker[0] == fence[0] and len(marker) >= len(fence):
+                    fence = None
+                yield TextBlock(line, kind="code")
+                continue
+            if fence is not None:
+                yield TextBlock(line, kind="code")
+                continue
+            
+            heading = MD_HEADING.match(line)
+            if heading and heading.group(2):
+                yield TextBlock(
+                    line, kind="heading", heading_level=len(heading.group(1)), title=heading.group(2)
+                )
+            elif MD_LIST_ITEM.match(line):
+                yield TextBlock(line, kind="list_item")
+            else:
+                yield TextBlock(line)
+    
     def process_document(self, file_content: bytes, file_type: str) -> str:
         """Process document and extract text based on file type"""
         if file_type == "pdf":
@@ -78,9 +187,73 @@ class DocumentProcessor:
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     
+    def process_document_with_pages(
+        self, file_content: bytes, file_type: str
+    ) -> Tuple[str, List[Tuple[int, int]]]:
+        """Extract text along with (page_number, start_offset) page boundaries (empty for non-PDF files)"""
+        if file_type == "pdf":
+            return self._join_pages(self.extract_pdf_pages(file_content))
+        return self.process_document(file_content, file_type), []
+    
+    @staticmethod
+    def page_range(
+        page_starts: List[Tuple[int, int]], start: int, end: int
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """Map a character span to the first and last page it covers"""
+        if not page_starts:
+            return None, None
+        offsets = [offset for _, offset in page_starts]
+        first = max(bisect_right(offsets, start) - 1, 0)
+        last = max(bisect_right(offsets, max(end - 1, start)) - 1, 0)
+        return page_starts[first][0], page_starts[last][0]
+    
     def chunk_text(self, text: str) -> List[str]:
         """Split text into chunks"""
         return self.text_splitter.split_text(text)
+    
+    def chunk_text_with_offsets(self, text: str) -> List[Tuple[str, int, int]]:
+        """Split text into chunks, returning (chunk, start, end) character offsets"""
+        return self.text_splitter.split_text_with_offsets(text)
+    
+    def iter_blocks(self, file_content: bytes, file_type: str) -> Iterator[TextBlock]:
+        """Yield the structural blocks of a Markdown or DOCX file"""
+        if file_type == "md":
+            return self.iter_md_blocks(file_content)
+        elif file_type in ["docx", "doc"]:
+            return self.iter_docx_blocks(file_content)
+        raise ValueError(f"No structured extraction for file type: {file_type}")
+    
+    def chunk_document(
+        self, file_content: bytes, file_type: str
+    ) -> Tuple[Iterator[TextChunk], Callable[[], str]]:
+        """
+        Extract and chunk a document as a stream.
+        
+        Markdown and DOCX files are chunked by section (see StructuredChunker),
+        so chunks carry their heading path; PDFs are chunked page-aware.
+        
+        Returns:
+            (chunks, get_text): an iterator of TextChunks and a function that
+            returns the extracted text once the iterator is exhausted
+        """
+        if settings.structured_chunking and file_type in STRUCTURED_FILE_TYPES:
+            chunker = StructuredChunker(self.text_splitter)
+            return chunker.chunk(self.iter_blocks(file_content, file_type)), lambda: chunker.text
+        
+        text, page_starts = self.process_document_with_pages(file_content, file_type)
+        chunks = (
+            TextChunk(chunk, start, end, None, *self.page_range(page_starts, start, end))
+            for chunk, start, end in self.chunk_text_with_offsets(text)
+        )
+        return chunks, lambda: text
+    
+    def count_truncated_chunks(self, chunks: List[str]) -> Optional[int]:
+        """Number of chunks longer than the embedding model's max_seq_length (None if unknown)"""
+        token_counter = self._load_tokenizer()
+        if token_counter is None or not self._max_seq_length:
+            return None
+        budget = self._max_seq_length - token_counter.num_special_tokens()
+        return sum(1 for count in token_counter.count_many(chunks) if count > budget)
 
 
 document_processor = DocumentProcessor()
@@ -0,0 +1,46 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models.models import Document
+from typing import AsyncIterator, List, Set
+
+# Documents loaded per IN query
+DOCUMENT_BATCH_SIZE = 500
+
+
+class DocumentService:
+    """Batched document lookups shared by bulk operations and exports"""
+
+    async def iter_document_batches(
+        self,
+        db: AsyncSession,
+        document_ids: List[int],
+        batch_size: int = DOCUMENT_BATCH_SIZE
+    ) -> AsyncIterator[List[Document]]:
+        """Load documents with their tags, one IN query per batch, in document_ids order"""
+        for batch_start in range(0, len(document_ids), batch_size):
+            batch = document_ids[batch_start:batch_start + batch_size]
+            result = await db.execute(
+                select(Document)
+                .options(selectinload(Document.tags))
+                .where(Document.id.in_(batch))
+            )
+            documents = {document.id: document for document in result.scalars().all()}
+            yield [documents[doc_id] for doc_id in batch if doc_id in documents]
+
+    async def existing_ids(
+        self,
+        db: AsyncSession,
+        document_ids: List[int],
+        batch_size: int = DOCUMENT_BATCH_SIZE
+    ) -> Set[int]:
+        """The subset of document_ids that exist"""
+        existing = set()
+        for batch_start in range(0, len(document_ids), batch_size):
+            batch = document_ids[batch_start:batch_start + batch_size]
+            result = await db.execute(select(Document.id).where(Document.id.in_(batch)))
+            existing.update(result.scalars().all())
+        return existing
+
+
+document_service = DocumentService()
@@ -1,33 +1,44 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from app.models.models import Document
-from typing import List
+from app.services.document_service import document_service
+from app.services.storage_service import storage_service
+from app.utils.zip_stream import stream_zip, ZipEntry
+from typing import AsyncIterator, Iterable, Iterator, List
+import csv
+import io
+import itertools
 import json
 import zipfile
-import io
-import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# PDF and DOCX files are already compressed; deflating them again costs CPU for no gain
+PRECOMPRESSED_TYPES = {"pdf", "docx"}
+
+CSV_FIELDS = ['id', 'filename', 'file_type', 'file_size', 'upload_date',
+              'description', 'is_public', 'tags', 'version']
+
+# Export format -> (media type, download filename)
+EXPORT_FORMATS = {
+    "zip": ("application/zip", "documents_export.zip"),
+    "json": ("application/json", "documents_export.json"),
+    "csv": ("text/csv", "documents_metadata.csv"),
+    "ndjson": ("application/x-ndjson", "documents_export.ndjson"),
+}
+
+def _csv_line(row: dict) -> bytes:
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=CSV_FIELDS).writerow(row)
+    return buffer.getvalue().encode("utf-8")
 
 
 class ExportService:
     """Service for exporting documents in various formats"""
     
-    async def export_document_json(
-        self,
-        db: AsyncSession,
-        document_id: int
-    ) -> dict:
-        """Export a single document as JSON"""
-        result = await db.execute(
-            select(Document)
-            .options(selectinload(Document.tags))
-            .where(Document.id == document_id)
-        )
-        document = result.scalar_one_or_none()
-        
-        if not document:
-            return None
-        
+    @staticmethod
+    def document_metadata(document: Document) -> dict:
+        """Exported metadata of a document (tags must be loaded)"""
         return {
             "id": document.id,
             "filename": document.original_filename,
@@ -41,84 +52,114 @@ class ExportService:
             "last_modified": document.last_modified.isoformat() if document.last_modified else None
         }
     
-    async def export_documents_json(
+    async def export_documents_zip(
         self,
         db: AsyncSession,
         document_ids: List[int]
-    ) -> List[dict]:
-        """Export multiple documents as JSON"""
+    ) -> tuple[Iterator[bytes], str]:
+        """
+        Export multiple documents as a ZIP file, streamed.
+        
+        Returns an iterator of archive bytes: each original is read in chunks
+        through the storage cache while the archive is written, and metadata.json is
+        the last entry. Iterate it from a thread (StreamingResponse does so
+        for sync iterators), since storage reads are blocking.
+        """
         documents = []
-        for doc_id in document_ids:
-            doc_data = await self.export_document_json(db, doc_id)
-            if doc_data:
-                documents.append(doc_data)
-        return documents
+        async for batch in document_service.iter_document_batches(db, document_ids):
+            documents.extend(batch)
+        
+        return self.iter_zip(documents), EXPORT_FORMATS["zip"][1]
     
-    async def export_document_file(
-        self,
-        db: AsyncSession,
-        document_id: int
-    ) -> tuple[bytes, str, str]:
-        """Export document in its original format"""
-        result = await db.execute(
-            select(Document)
-            .where(Document.id == document_id)
-        )
-        document = result.scalar_one_or_none()
+    def iter_zip(self, documents: Iterable[Document]) -> Iterator[bytes]:
+        """ZIP archive of the documents' original files followed by metadata.json (tags must be loaded)"""
+        return stream_zip(self._zip_entries(documents))
+    
+    def _zip_entries(self, documents: Iterable[Document]) -> Iterator[ZipEntry]:
+        metadata = []
+        for document in documents:
+            metadata.append(self.document_metadata(document))
+            chunks = storage_service.iter_cached_file(document.file_path)
+            try:
+                # Open the object before starting its entry, so a missing
+                # object is skipped instead of leaving a broken entry
+                first_chunk = next(chunks, b"")
+            except Exception as e:
+                logger.error(f"Skipping {document.file_path} in ZIP export: {e}")
+                continue
+            yield ZipEntry(
+                document.original_filename,
+                itertools.chain([first_chunk], chunks),
+                compress_type=(
+                    zipfile.ZIP_STORED if document.file_type in PRECOMPRESSED_TYPES else zipfile.ZIP_DEFLATED
+                ),
+                size=document.file_size
+            )
         
-        if not document or not os.path.exists(document.file_path):
-            return None, None, None
+        yield ZipEntry("metadata.json", [json.dumps(metadata, indent=2).encode("utf-8")])
+    
+    def _metadata_encoder(self, export_format: str):
+        """
+        (header, encode_row, footer) for a metadata format.
         
-        with open(document.file_path, "rb") as f:
-            content = f.read()
+        encode_row(document, index) returns the bytes for one document and
+        footer(count) closes the file, so the same encoder serves sync and
+        async streams.
+        """
+        if export_format == "json":
+            def encode_row(document: Document, index: int) -> bytes:
+                prefix = b", " if index else b""
+                return prefix + json.dumps(self.document_metadata(document)).encode("utf-8")
+            return b'{"documents": [', encode_row, lambda count: f'], "count": {count}}}'.encode("utf-8")
         
-        return content, document.original_filename, document.file_type
-    
-    async def export_documents_zip(
-        self,
-        db: AsyncSession,
-        document_ids: List[int]
-    ) -> tuple[bytes, str]:
-        """Export multiple documents as a ZIP file"""
-        zip_buffer = io.BytesIO()
+        if export_format == "ndjson":
+            def encode_row(document: Document, index: int) -> bytes:
+                return json.dumps(self.document_metadata(document)).encode("utf-8") + b"\n"
+            return b"", encode_row, lambda count: b""
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add documents
-            for doc_id in document_ids:
-                content, filename, file_type = await self.export_document_file(db, doc_id)
-                if content:
-                    zip_file.writestr(filename, content)
-            
-            # Add metadata JSON
-            metadata = await self.export_documents_json(db, document_ids)
-            zip_file.writestr("metadata.json", json.dumps(metadata, indent=2))
+        if export_format == "csv":
+            def encode_row(document: Document, index: int) -> bytes:
+                return _csv_line(self._csv_row(self.document_metadata(document)))
+            return _csv_line({k: k for k in CSV_FIELDS}), encode_row, lambda count: b""
         
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue(), "documents_export.zip"
+        raise ValueError(f"Unsupported export format: {export_format}")
+    
+    def iter_metadata(self, export_format: str, documents: Iterable[Document]) -> Iterator[bytes]:
+        """Document metadata as json, ndjson or csv, one document at a time (tags must be loaded)"""
+        header, encode_row, footer = self._metadata_encoder(export_format)
+        yield header
+        count = 0
+        for document in documents:
+            yield encode_row(document, count)
+            count += 1
+        yield footer(count)
     
-    async def export_documents_metadata_csv(
+    async def stream_metadata(
         self,
         db: AsyncSession,
+        export_format: str,
         document_ids: List[int]
-    ) -> tuple[str, str]:
-        """Export document metadata as CSV"""
-        import csv
-        from io import StringIO
-        
-        csv_buffer = StringIO()
-        fieldnames = ['id', 'filename', 'file_type', 'file_size', 'upload_date', 
-                     'description', 'is_public', 'tags', 'version']
-        writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for doc_id in document_ids:
-            doc_data = await self.export_document_json(db, doc_id)
-            if doc_data:
-                # Convert tags list to comma-separated string
-                doc_data['tags'] = ', '.join(doc_data['tags']) if doc_data['tags'] else ''
-                writer.writerow({k: doc_data.get(k, '') for k in fieldnames})
-        
-        return csv_buffer.getvalue(), "documents_metadata.csv"
+    ) -> AsyncIterator[bytes]:
+        """Stream document metadata as json, ndjson or csv while loading documents in batches"""
+        header, encode_row, footer = self._metadata_encoder(export_format)
+        yield header
+        count = 0
+        async for batch in document_service.iter_document_batches(db, document_ids):
+            yield b"".join(encode_row(document, count + i) for i, document in enumerate(batch))
+            count += len(batch)
+        yield footer(count)
+    
+    @staticmethod
+    def _csv_row(doc_data: dict) -> dict:
+        # Convert tags list to comma-separated string
+        doc_data['tags'] = ', '.join(doc_data['tags']) if doc_data['tags'] else ''
+        return {k: doc_data.get(k, '') for k in CSV_FIELDS}
+    
+    def iter_export(self, export_format: str, documents: Iterable[Document]) -> Iterator[bytes]:
+        """Export file content in one of EXPORT_FORMATS"""
+        if export_format == "zip":
+            return self.iter_zip(documents)
+        return self.iter_metadata(export_format, documents)
 
 
 export_service = ExportService()
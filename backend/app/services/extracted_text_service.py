@@ -0,0 +1,86 @@
+from minio.error import S3Error
+from app.models.models import Document
+from app.services.storage_service import storage_service
+from app.services.document_processor import document_processor
+from typing import Optional
+import gzip
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractedTextService:
+    """Service for caching extracted document text in MinIO
+
+    The text is stored gzip-compressed next to the original file, stamped
+    with the ETag of the original object it was extracted from. A cached
+    copy is only used while that stamp still matches the original.
+    """
+
+    SOURCE_ETAG_KEY = "source-etag"
+
+    def object_name(self, document: Document) -> str:
+        """MinIO object name of a document's cached text"""
+        return f"extracted/{document.file_path}.txt.gz"
+
+    def save(self, document: Document, text: str, source_etag: Optional[str] = None) -> None:
+        """Compress and store extracted text for a document"""
+        if source_etag is None:
+            source_etag = storage_service.stat_file(document.file_path).etag
+        storage_service.upload_file(
+            gzip.compress(text.encode("utf-8")),
+            self.object_name(document),
+            content_type="application/gzip",
+            metadata={self.SOURCE_ETAG_KEY: source_etag}
+        )
+
+    def load(self, document: Document, source_etag: Optional[str] = None) -> Optional[str]:
+        """Return the cached text, or None if missing or extracted from an older file"""
+        try:
+            if source_etag is None:
+                source_etag = storage_service.stat_file(document.file_path).etag
+            cached = storage_service.stat_file(self.object_name(document))
+        except S3Error:
+            return None
+
+        cached_etag = (cached.metadata or {}).get(f"x-amz-meta-{self.SOURCE_ETAG_KEY}")
+        if cached_etag != source_etag:
+            logger.info(f"Cached text for document {document.id} is stale")
+            return None
+
+        data = storage_service.download_file(self.object_name(document))
+        return gzip.decompress(data).decode("utf-8")
+
+    def get_or_build(self, document: Document, source_etag: Optional[str] = None) -> str:
+        """
+        Return the cached text, re-extracting and caching it when missing or stale.
+
+        Pass the original's ETag when it is already known to save a stat
+        round-trip. Blocking (MinIO and possibly OCR): call from a thread.
+        """
+        if source_etag is None:
+            source_etag = storage_service.stat_file(document.file_path).etag
+        text = self.load(document, source_etag)
+        if text is not None:
+            return text
+
+        logger.info(f"Rebuilding extracted text for document {document.id}")
+        with storage_service.open_file(document.file_path, etag=source_etag) as file_content:
+            text = document_processor.process_document(file_content, document.file_type)
+        try:
+            self.save(document, text, source_etag)
+        except Exception as e:
+            logger.error(f"Failed to cache extracted text for document {document.id}: {e}")
+        return text
+
+    def delete(self, document: Document) -> None:
+        """Remove a document's cached text if present"""
+        try:
+            storage_service.delete_file(self.object_name(document))
+        except S3Error:
+            pass
+        except Exception as e:
+            logger.error(f"Error deleting cached text for document {document.id}: {e}")
+
+
+extracted_text_service = ExtractedTextService()
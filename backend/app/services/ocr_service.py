@@ -1,30 +1,107 @@
 import base64
 import logging
-import io
-from typing import List, Optional
-from pdf2image import convert_from_bytes
-from openai import OpenAI
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+from openai import OpenAI, APIStatusError, APIConnectionError
+from app.utils.rate_limiter import TokenBucket
+from ocr_extractor.cache import OCRCache, image_digest, make_cache_key
+from ocr_extractor.image_encoding import MIME_TYPES, prepare_image, encode_image_bytes, encoding_profile
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+OCR_PROMPT = "Extract all text from this image. Preserve formatting and structure."
+
 class OCRService:
     def __init__(self):
         self.client = None
         if settings.ocr_api_key:
             self.client = OpenAI(
-                api_key=settings.ocr_api_key, 
-                base_url=settings.ocr_base_url
+                api_key=settings.ocr_api_key,
+                base_url=settings.ocr_base_url,
+                max_retries=0  # Retries are handled by _create_completion
             )
+        self.rate_limiter = TokenBucket(
+            rate=settings.ocr_rate_limit,
+            capacity=settings.ocr_rate_burst
+        )
+        self.cache = None
+        if settings.ocr_cache_path:
+            try:
+                self.cache = OCRCache(settings.ocr_cache_path, settings.ocr_cache_max_bytes)
+            except Exception as e:
+                logger.error(f"Could not open OCR cache at {settings.ocr_cache_path}: {e}")
 
     def is_configured(self) -> bool:
         return self.client is not None
 
     def encode_image(self, image) -> str:
-        """Encode PIL Image to base64."""
-        buffered = io.BytesIO()
-        image.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode("utf-8")
+        """Preprocess and encode PIL Image to base64 using the configured OCR image settings."""
+        image = prepare_image(
+            image,
+            grayscale=settings.ocr_image_grayscale,
+            max_pixels=settings.ocr_image_max_pixels
+        )
+        image_bytes = encode_image_bytes(
+            image,
+            image_format=settings.ocr_image_format,
+            quality=settings.ocr_image_quality
+        )
+        return base64.b64encode(image_bytes).decode("utf-8")
+
+    @staticmethod
+    def _encoding_profile() -> str:
+        return encoding_profile(
+            settings.ocr_image_format,
+            settings.ocr_image_quality,
+            settings.ocr_image_grayscale,
+            settings.ocr_image_max_pixels
+        )
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Rate limits, server errors and connection failures are worth retrying."""
+        if isinstance(error, APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, APIConnectionError)
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when present."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.ocr_retry_max_delay)
+            except ValueError:
+                pass
+        backoff = min(settings.ocr_retry_max_delay, settings.ocr_retry_base_delay * (2 ** attempt))
+        return random.uniform(0, backoff)
+
+    def _create_completion(self, **kwargs):
+        """Call the chat completion endpoint with rate limiting and retries."""
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                return self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                if attempt >= settings.ocr_max_retries or not self._is_retryable(e):
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                logger.warning(
+                    f"OCR request failed ({e}), retrying in {delay:.2f}s "
+                    f"(attempt {attempt}/{settings.ocr_max_retries})"
+                )
+                time.sleep(delay)
 
     def extract_text_from_image(self, image) -> str:
         """Extract text from a single PIL image using OCR API."""
@@ -32,9 +109,21 @@ class OCRService:
             raise ValueError("OCR service is not configured (missing API key)")
 
         try:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = make_cache_key(
+                    settings.ocr_model_name,
+                    OCR_PROMPT,
+                    f"{image_digest(image)}:{self._encoding_profile()}"
+                )
+                cached_text = self.cache.get(cache_key)
+                if cached_text is not None:
+                    logger.info("OCR cache hit")
+                    return cached_text
+
             base64_image = self.encode_image(image)
 
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=settings.ocr_model_name,
                 messages=[
                     {
@@ -42,11 +131,11 @@ class OCRService:
                         "content": [
                             {
                                 "type": "text",
-                                "text": "Extract all text from this image. Preserve formatting and structure.",
+                                "text": OCR_PROMPT,
                             },
                             {
                                 "type": "image_url",
-                                "image_url": f"data:image/png;base64,{base64_image}",
+                                "image_url": f"data:{MIME_TYPES[settings.ocr_image_format.lower()]};base64,{base64_image}",
                             },
                         ],
                     }
@@ -60,12 +149,103 @@ class OCRService:
             )
 
             extracted_text = response.choices[0].message.content
+            if cache_key is not None and extracted_text is not None:
+                self.cache.set(cache_key, extracted_text)
             return extracted_text
 
         except Exception as e:
             logger.error(f"Error extracting text from image: {e}")
             raise
 
+    @staticmethod
+    def _page_windows(page_numbers: List[int]) -> List[List[int]]:
+        """Group sorted page numbers into contiguous runs of at most ocr_page_window pages."""
+        window_size = max(1, settings.ocr_page_window)
+        windows = []
+        for page_number in page_numbers:
+            if (
+                windows
+                and page_number == windows[-1][-1] + 1
+                and len(windows[-1]) < window_size
+            ):
+                windows[-1].append(page_number)
+            else:
+                windows.append([page_number])
+        return windows
+
+    @staticmethod
+    @contextmanager
+    def _pdf_workdir(file_content: bytes) -> Iterator[Tuple[str, str]]:
+        """Temporary directory holding the PDF, written once, for pdfinfo and every window.
+
+        Yields (directory, pdf path); rendered pages go to the same directory.
+        """
+        with tempfile.TemporaryDirectory(prefix="ocr_") as workdir:
+            pdf_path = os.path.join(workdir, "source.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(file_content)
+            yield workdir, pdf_path
+
+    def _rasterize_window(self, pdf_path: str, window: List[int], output_folder: str) -> List[str]:
+        """Render a contiguous page window to PNG files and return their paths in page order."""
+        return convert_from_path(
+            pdf_path,
+            dpi=settings.ocr_dpi,
+            first_page=window[0],
+            last_page=window[-1],
+            thread_count=settings.ocr_rasterize_threads,
+            output_folder=output_folder,
+            fmt="png",
+            paths_only=True,
+        )
+
+    def _ocr_page_file(self, page_number: int, image_path: str) -> str:
+        """Load a rasterized page from disk, OCR it and delete the file.
+
+        A failed page is logged and returns "", so the pages that did
+        succeed (and were already paid for) are still used.
+        """
+        logger.info(f"Processing page {page_number} with OCR")
+        try:
+            with Image.open(image_path) as image:
+                return self.extract_text_from_image(image)
+        except Exception as e:
+            logger.error(f"OCR failed for page {page_number}: {e}")
+            return ""
+        finally:
+            os.remove(image_path)
+
+    def _ocr_pdf_pages_concurrently(self, pdf_path: str, page_numbers: List[int], output_folder: str) -> List[str]:
+        """OCR pages in parallel, bounded by ocr_concurrency; results keep the input order.
+
+        Pages are rasterized from the PDF at pdf_path one window at a time
+        into output_folder and submitted to the pool as soon as they are
+        rendered. The next window is rasterized while earlier pages are still
+        being OCR'd, once no more than ocr_concurrency pages are outstanding,
+        so the pool stays busy and at most ocr_concurrency + ocr_page_window
+        page images exist at once.
+        """
+        futures = {}
+        in_flight = set()
+        max_workers = max(1, min(settings.ocr_concurrency, len(page_numbers)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr") as executor:
+            for window in self._page_windows(sorted(set(page_numbers))):
+                while len(in_flight) > max_workers:
+                    _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                try:
+                    image_paths = self._rasterize_window(pdf_path, window, output_folder)
+                except Exception as e:
+                    logger.error(f"Rasterizing pages {window[0]}-{window[-1]} failed: {e}")
+                    continue
+                for page_number, image_path in zip(window, image_paths):
+                    future = executor.submit(self._ocr_page_file, page_number, image_path)
+                    futures[page_number] = future
+                    in_flight.add(future)
+
+            results = {page_number: future.result() for page_number, future in futures.items()}
+
+        return [results.get(page_number, "") for page_number in page_numbers]
+
     def extract_text_from_pdf(self, file_content: bytes) -> str:
         """Extract text from PDF bytes using OCR."""
         if not self.client:
@@ -73,19 +253,35 @@ class OCRService:
             return ""
 
         try:
-            logger.info("Converting PDF bytes to images for OCR")
-            images = convert_from_bytes(file_content, dpi=settings.ocr_dpi)
-            
-            full_text = []
-            for i, image in enumerate(images, 1):
-                logger.info(f"Processing page {i}/{len(images)} with OCR")
-                page_text = self.extract_text_from_image(image)
-                full_text.append(f"--- Page {i} ---\n{page_text}")
-            
+            with self._pdf_workdir(file_content) as (workdir, pdf_path):
+                page_count = pdfinfo_from_path(pdf_path)["Pages"]
+                logger.info(f"Running OCR on {page_count} PDF pages")
+                page_numbers = list(range(1, page_count + 1))
+                page_texts = self._ocr_pdf_pages_concurrently(pdf_path, page_numbers, workdir)
+
+            full_text = [
+                f"--- Page {i} ---\n{page_text}"
+                for i, page_text in zip(page_numbers, page_texts)
+            ]
             return "\n\n".join(full_text)
 
         except Exception as e:
             logger.error(f"Error in OCR extraction: {e}")
             raise
 
+    def extract_text_from_pdf_pages(self, file_content: bytes, page_numbers: List[int]) -> Dict[int, str]:
+        """Extract text from selected PDF pages (1-based) using OCR.
+
+        Only the requested pages are rasterized. Returns a mapping of
+        page number to extracted text.
+        """
+        if not self.client:
+            logger.warning("OCR service not configured, skipping OCR extraction")
+            return {}
+
+        logger.info(f"Running OCR on {len(page_numbers)} PDF pages")
+        with self._pdf_workdir(file_content) as (workdir, pdf_path):
+            page_texts = self._ocr_pdf_pages_concurrently(pdf_path, page_numbers, workdir)
+        return dict(zip(page_numbers, page_texts))
+
 ocr_service = OCRService()
@@ -19,6 +19,8 @@ class QdrantService:
             model_clean = settings.embedding_model_name.replace("/", "-").replace("_", "-").lower()
             self.vector_name = f"fast-{model_clean}"
             self.openai_client = None
+            self.tokenizer = self.embedding_model.tokenizer
+            self.max_seq_length = self.embedding_model.max_seq_length
         else:
             # For OpenAI embeddings, dimension is typically 1536
             self.embedding_dimension = 1536
@@ -26,6 +28,8 @@ class QdrantService:
             from openai import OpenAI
             self.openai_client = OpenAI(api_key=settings.openai_api_key)
             self.embedding_model = None
+            self.tokenizer = None
+            self.max_seq_length = None
             
         self._ensure_collection_exists()
     
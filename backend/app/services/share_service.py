@@ -1,12 +1,79 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import event, select, or_, and_
 from sqlalchemy.orm import selectinload
 from app.models.models import Document, DocumentShare, User
-from typing import Optional
+from app.utils.ttl_cache import TTLCache, MISSING
+from config import settings
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Permission hierarchy: admin > edit > view
+PERMISSION_LEVELS = {"view": 1, "edit": 2, "admin": 3}
+
+# Document ids resolved per IN query
+PERMISSION_BATCH_SIZE = 500
+
+
+def has_permission(permission: Optional[str], required_permission: str = "view") -> bool:
+    """Whether a resolved permission satisfies required_permission"""
+    if not permission:
+        return False
+    return PERMISSION_LEVELS.get(permission, 0) >= PERMISSION_LEVELS.get(required_permission, 0)
 
 
 class ShareService:
-    """Service for managing document sharing and permissions"""
+    """
+    Service for managing document sharing and permissions.
+    
+    Resolved permissions are cached per (user_id, document_id) at two
+    levels: in the request's session (db.info), so repeated checks within
+    one request never query twice, and in a short TTL cache shared by the
+    process. Writes that change access go through invalidate_document /
+    invalidate_permission, which clear both, and clear the TTL cache again
+    once the session commits: until then other requests still read the old
+    rows and may have cached them in the meantime.
+    """
+    
+    SESSION_CACHE_KEY = "permission_cache"
+    PENDING_KEY = "permission_invalidations"
+    
+    def __init__(self):
+        self.cache = TTLCache(settings.permission_cache_max_entries, settings.permission_cache_ttl)
+    
+    def _session_cache(self, db: AsyncSession) -> dict:
+        return db.info.setdefault(self.SESSION_CACHE_KEY, {})
+    
+    def _invalidate_now_and_after_commit(self, db: AsyncSession, invalidate: Callable[[], object]) -> None:
+        invalidate()
+        pending = db.info.get(self.PENDING_KEY)
+        if pending is None:
+            pending = db.info[self.PENDING_KEY] = []
+            sync_session = getattr(db, "sync_session", db)
+            event.listen(sync_session, "after_commit", self._run_pending)
+            event.listen(sync_session, "after_rollback", self._drop_pending)
+        pending.append(invalidate)
+    
+    def _run_pending(self, session) -> None:
+        pending = session.info.get(self.PENDING_KEY, [])
+        for invalidate in pending:
+            invalidate()
+        pending.clear()
+    
+    def _drop_pending(self, session) -> None:
+        session.info.get(self.PENDING_KEY, []).clear()
+    
+    def invalidate_permission(self, db: AsyncSession, document_id: int, user_id: int) -> None:
+        """Forget one user's cached permission for a document (now and after db commits)"""
+        self._session_cache(db).pop((user_id, document_id), None)
+        self._invalidate_now_and_after_commit(db, lambda: self.cache.invalidate((user_id, document_id)))
+    
+    def invalidate_document(self, db: AsyncSession, document_id: int) -> None:
+        """Forget every cached permission for a document (visibility change, deletion), now and after db commits"""
+        session_cache = self._session_cache(db)
+        for key in [key for key in session_cache if key[1] == document_id]:
+            del session_cache[key]
+        self._invalidate_now_and_after_commit(
+            db, lambda: self.cache.invalidate_where(lambda key: key[1] == document_id)
+        )
     
     async def share_document(
         self,
@@ -27,6 +94,8 @@ class ShareService:
         )
         existing_share = result.scalar_one_or_none()
         
+        self.invalidate_permission(db, document_id, user_id)
+        
         if existing_share:
             # Update existing share
             existing_share.permission = permission
@@ -57,6 +126,7 @@ class ShareService:
         share = result.scalar_one_or_none()
         
         if share:
+            self.invalidate_permission(db, share.document_id, share.user_id)
             await db.delete(share)
             return True
         return False
@@ -87,6 +157,78 @@ class ShareService:
         )
         return result.scalars().all()
     
+    async def get_user_permissions(
+        self,
+        db: AsyncSession,
+        document_ids: Iterable[int],
+        user_id: int
+    ) -> Dict[int, Optional[str]]:
+        """
+        Resolve a user's effective permission for many documents at once.
+        
+        Cached permissions are used first; each batch of the remaining ids
+        is one query joining documents to the user's shares. Owners get "admin", public documents at least "view", and
+        shared documents the higher of that and the share's permission.
+        
+        Returns:
+            Map of document id to permission (None when the user has no
+            access); ids of documents that do not exist are left out
+        """
+        session_cache = self._session_cache(db)
+        permissions = {}
+        ids = []
+        for doc_id in dict.fromkeys(document_ids):
+            key = (user_id, doc_id)
+            if key in session_cache:
+                permissions[doc_id] = session_cache[key]
+                continue
+            cached = self.cache.get(key)
+            if cached is not MISSING:
+                permissions[doc_id] = session_cache[key] = cached
+                continue
+            ids.append(doc_id)
+        
+        for batch_start in range(0, len(ids), PERMISSION_BATCH_SIZE):
+            batch = ids[batch_start:batch_start + PERMISSION_BATCH_SIZE]
+            result = await db.execute(
+                select(Document.id, Document.owner_id, Document.is_public, DocumentShare.permission)
+                .outerjoin(
+                    DocumentShare,
+                    and_(
+                        DocumentShare.document_id == Document.id,
+                        DocumentShare.user_id == user_id
+                    )
+                )
+                .where(Document.id.in_(batch))
+            )
+            for doc_id, owner_id, is_public, share_permission in result.all():
+                if owner_id == user_id:
+                    permission = "admin"
+                else:
+                    candidates = [share_permission, "view" if is_public == "public" else None]
+                    permission = max(
+                        (p for p in candidates if p),
+                        key=lambda p: PERMISSION_LEVELS.get(p, 0),
+                        default=None
+                    )
+                permissions[doc_id] = session_cache[(user_id, doc_id)] = permission
+                self.cache.set((user_id, doc_id), permission)
+        return permissions
+    
+    async def filter_permitted(
+        self,
+        db: AsyncSession,
+        document_ids: List[int],
+        user_id: int,
+        required_permission: str = "view"
+    ) -> List[int]:
+        """The ids (in request order) the user has required_permission for"""
+        permissions = await self.get_user_permissions(db, document_ids, user_id)
+        return [
+            doc_id for doc_id in document_ids
+            if has_permission(permissions.get(doc_id), required_permission)
+        ]
+    
     async def check_permission(
         self,
         db: AsyncSession,
@@ -95,43 +237,8 @@ class ShareService:
         required_permission: str = "view"
     ) -> bool:
         """Check if user has required permission for document"""
-        # Get document
-        result = await db.execute(
-            select(Document)
-            .where(Document.id == document_id)
-        )
-        document = result.scalar_one_or_none()
-        
-        if not document:
-            return False
-        
-        # Owner has all permissions
-        if document.owner_id == user_id:
-            return True
-        
-        # Check if document is public (view only)
-        if document.is_public == "public" and required_permission == "view":
-            return True
-        
-        # Check shared permissions
-        result = await db.execute(
-            select(DocumentShare)
-            .where(
-                DocumentShare.document_id == document_id,
-                DocumentShare.user_id == user_id
-            )
-        )
-        share = result.scalar_one_or_none()
-        
-        if not share:
-            return False
-        
-        # Permission hierarchy: admin > edit > view
-        permission_levels = {"view": 1, "edit": 2, "admin": 3}
-        user_level = permission_levels.get(share.permission, 0)
-        required_level = permission_levels.get(required_permission, 0)
-        
-        return user_level >= required_level
+        permission = await self.get_user_permission(db, document_id, user_id)
+        return has_permission(permission, required_permission)
     
     async def get_user_permission(
         self,
@@ -140,35 +247,8 @@ class ShareService:
         user_id: int
     ) -> Optional[str]:
         """Get user's permission level for a document"""
-        # Get document
-        result = await db.execute(
-            select(Document)
-            .where(Document.id == document_id)
-        )
-        document = result.scalar_one_or_none()
-        
-        if not document:
-            return None
-        
-        # Owner has admin permission
-        if document.owner_id == user_id:
-            return "admin"
-        
-        # Check if document is public
-        if document.is_public == "public":
-            return "view"
-        
-        # Check shared permissions
-        result = await db.execute(
-            select(DocumentShare)
-            .where(
-                DocumentShare.document_id == document_id,
-                DocumentShare.user_id == user_id
-            )
-        )
-        share = result.scalar_one_or_none()
-        
-        return share.permission if share else None
+        permissions = await self.get_user_permissions(db, [document_id], user_id)
+        return permissions.get(document_id)
 
 
 share_service = ShareService()
@@ -1,11 +1,74 @@
 from minio import Minio
 from minio.error import S3Error
+from contextlib import contextmanager
+from datetime import timedelta
+import hashlib
 import logging
 import io
+from urllib.parse import quote
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple, Union
+from app.utils.object_cache import ObjectCache, MappedFile, open_mapped
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+
+class FileTooLargeError(Exception):
+    """Raised while streaming an upload that exceeds the size limit"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File size exceeds maximum allowed size of {max_size} bytes")
+        self.max_size = max_size
+
+
+class _CountingReader:
+    """File wrapper that hashes and counts bytes as they are read, enforcing a size limit"""
+
+    def __init__(self, stream: BinaryIO, max_size: Optional[int] = None):
+        self.stream = stream
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise FileTooLargeError(self.max_size)
+        self.sha256.update(data)
+        return data
+
+
+class IterableStream:
+    """Read-only file-like view of an iterator of byte chunks, for upload_stream"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while size < 0 or available < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            available += len(chunk)
+        data = b"".join(parts)
+        if size < 0:
+            self._buffer = b""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def content_disposition(disposition: str, filename: str) -> str:
+    """Content-Disposition header value with an ASCII fallback and an RFC 5987 UTF-8 filename"""
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace('"', "'")
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
 class StorageService:
     def __init__(self):
         self.client = Minio(
@@ -15,6 +78,21 @@ class StorageService:
             secure=settings.minio_secure
         )
         self.bucket_name = settings.minio_bucket_name
+        # Presigned URLs must be signed for the host the browser will use;
+        # the region is fixed so signing needs no request to that host
+        self.presign_client = Minio(
+            settings.minio_public_endpoint or settings.minio_endpoint,
+            access_key=settings.minio_access_key,
+            secret_key=settings.minio_secret_key,
+            secure=settings.minio_public_secure if settings.minio_public_endpoint else settings.minio_secure,
+            region=settings.minio_region
+        )
+        self.cache = None
+        if settings.storage_cache_dir:
+            try:
+                self.cache = ObjectCache(settings.storage_cache_dir, settings.storage_cache_max_bytes)
+            except Exception as e:
+                logger.error(f"Could not open storage cache at {settings.storage_cache_dir}: {e}")
         self._ensure_bucket_exists()
 
     def _ensure_bucket_exists(self):
@@ -25,7 +103,13 @@ class StorageService:
         except Exception as e:
             logger.error(f"Error checking/creating bucket: {e}")
 
-    def upload_file(self, file_data: bytes, object_name: str, content_type: str = "application/octet-stream"):
+    def upload_file(
+        self,
+        file_data: bytes,
+        object_name: str,
+        content_type: str = "application/octet-stream",
+        metadata: Optional[Dict[str, str]] = None
+    ):
         try:
             file_stream = io.BytesIO(file_data)
             self.client.put_object(
@@ -33,7 +117,8 @@ class StorageService:
                 object_name,
                 file_stream,
                 length=len(file_data),
-                content_type=content_type
+                content_type=content_type,
+                metadata=metadata
             )
             logger.info(f"Uploaded {object_name} to MinIO")
             return object_name
@@ -41,6 +126,42 @@ class StorageService:
             logger.error(f"MinIO upload error: {e}")
             raise
 
+    def upload_stream(
+        self,
+        stream: BinaryIO,
+        object_name: str,
+        content_type: str = "application/octet-stream",
+        max_size: Optional[int] = None,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, str]:
+        """
+        Upload a file-like object without loading it into memory.
+
+        The stream is read in upload_part_size parts and sent as a multipart
+        upload; a stream larger than max_size raises FileTooLargeError and
+        the multipart upload is aborted. Blocking - call it from a thread
+        pool in async code.
+
+        Returns:
+            (size in bytes, hex SHA-256 of the content)
+        """
+        reader = _CountingReader(stream, max_size)
+        try:
+            self.client.put_object(
+                self.bucket_name,
+                object_name,
+                reader,
+                length=-1,
+                part_size=settings.upload_part_size,
+                content_type=content_type,
+                metadata=metadata
+            )
+        except S3Error as e:
+            logger.error(f"MinIO upload error: {e}")
+            raise
+        logger.info(f"Uploaded {object_name} to MinIO ({reader.size} bytes)")
+        return reader.size, reader.sha256.hexdigest()
+
     def download_file(self, object_name: str) -> bytes:
         try:
             response = self.client.get_object(self.bucket_name, object_name)
@@ -52,6 +173,116 @@ class StorageService:
             if 'response' in locals():
                 response.close()
                 
+    @contextmanager
+    def open_file(self, object_name: str, etag: Optional[str] = None) -> Iterator[Union[MappedFile, bytes]]:
+        """
+        Read an object through the local disk cache.
+
+        Yields a read-only memory-mapped view of the cached file (usable as
+        bytes or as a seekable stream) that is closed on exit. On a miss the
+        object is streamed into the cache first; objects are keyed by ETag,
+        so a replaced object is fetched again. Without a cache directory the
+        object is downloaded into memory.
+
+        Pass the object's ETag when the caller already has it, to skip the
+        stat request.
+        """
+        if self.cache is None:
+            yield self.download_file(object_name)
+            return
+
+        if etag is None:
+            etag = self.stat_file(object_name).etag
+        path = self.cache.get(object_name, etag)
+        if path is None:
+            path = self.cache.put(object_name, etag, self.iter_file(object_name))
+        view = open_mapped(path)
+        try:
+            yield view
+        finally:
+            if isinstance(view, MappedFile):
+                view.close()
+
+    def iter_cached_file(self, object_name: str, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+        """
+        Stream an object in chunks, from the local disk cache when it is already there.
+
+        A miss is streamed from MinIO without filling the cache, so bulk reads
+        (ZIP exports) neither hold whole objects nor evict hot entries.
+        Blocking generator.
+        """
+        cached = None
+        if self.cache is not None:
+            path = self.cache.get(object_name, self.stat_file(object_name).etag)
+            if path is not None:
+                try:
+                    cached = open(path, "rb")
+                except FileNotFoundError:
+                    # Evicted by another worker since the lookup
+                    pass
+        if cached is None:
+            yield from self.iter_file(object_name, chunk_size=chunk_size)
+            return
+        with cached:
+            while True:
+                chunk = cached.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Object cache counters, for /metrics"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
+    def iter_file(
+        self,
+        object_name: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        chunk_size: int = 256 * 1024
+    ) -> Iterator[bytes]:
+        """
+        Stream an object (or the byte range [offset, offset + length)) in chunks.
+
+        Blocking generator; StreamingResponse iterates it in a thread pool.
+        The connection is released when the generator is exhausted or closed.
+        """
+        response = self.client.get_object(
+            self.bucket_name, object_name, offset=offset, length=length or 0
+        )
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def presigned_download_url(
+        self,
+        object_name: str,
+        expires: timedelta,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> str:
+        """Short-lived URL the client can use to fetch the object directly from MinIO"""
+        response_headers = {}
+        if filename:
+            response_headers["response-content-disposition"] = content_disposition("attachment", filename)
+        if content_type:
+            response_headers["response-content-type"] = content_type
+        return self.presign_client.presigned_get_object(
+            self.bucket_name, object_name, expires=expires, response_headers=response_headers or None
+        )
+
+    def stat_file(self, object_name: str):
+        """Return object info (etag, size, metadata) without downloading the object"""
+        try:
+            return self.client.stat_object(self.bucket_name, object_name)
+        except S3Error as e:
+            logger.error(f"MinIO stat error: {e}")
+            raise
+
     def delete_file(self, object_name: str):
         try:
             self.client.remove_object(self.bucket_name, object_name)
@@ -1,16 +1,24 @@
 import asyncio
+from contextlib import ExitStack
 from celery import shared_task
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import sessionmaker
-from app.models.models import Document, DocumentChunk, Tag
-from app.services.storage_service import storage_service
+from sqlalchemy import create_engine, select, delete, update, func
+from sqlalchemy.orm import sessionmaker, selectinload
+from app.models.models import (
+    Document, DocumentChunk, Tag, ExportJob, DocumentAnalytics, AnalyticsDailyRollup, AnalyticsRollupState
+)
+from app.services.storage_service import storage_service, IterableStream
+from app.services.export_service import export_service, EXPORT_FORMATS
 from app.services.document_processor import document_processor
 from app.services.qdrant_service import qdrant_service
 from app.services.ocr_service import ocr_service
+from app.services.extracted_text_service import extracted_text_service
 from config import settings
+from datetime import date, datetime, time as dt_time, timedelta
 import logging
 import uuid
 import os
+import resource
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +28,17 @@ sync_db_url = settings.database_url.replace("+aiosqlite", "")
 engine = create_engine(sync_db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this worker process in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
 @shared_task(name="app.tasks.process_document_task")
 def process_document_task(document_id: int):
     logger.info(f"Starting processing for document {document_id}")
+    start_peak_rss = _peak_rss_mb()
     db = SessionLocal()
+    open_files = ExitStack()
     try:
         document = db.query(Document).filter(Document.id == document_id).first()
         if not document:
@@ -33,9 +48,12 @@ def process_document_task(document_id: int):
         document.status = "processing"
         db.commit()
 
-        # Download from MinIO
+        # Download from MinIO (through the local cache, as a memory-mapped view)
         try:
-            file_content = storage_service.download_file(document.file_path)
+            source_etag = storage_service.stat_file(document.file_path).etag
+            file_content = open_files.enter_context(
+                storage_service.open_file(document.file_path, etag=source_etag)
+            )
         except Exception as e:
             document.status = "failed"
             document.processing_error = f"Download failed: {str(e)}"
@@ -43,37 +61,63 @@ def process_document_task(document_id: int):
             return
 
         # Process document
+        point_ids = []
         try:
-            # Extract text (with OCR fallback)
-            text = document_processor.process_document(file_content, document.file_type)
-            
-            # Chunk text
-            chunks = document_processor.chunk_text(text)
+            # Extract and chunk the document as a stream; Markdown/DOCX chunks
+            # follow heading sections, PDF chunks keep their source pages
+            chunks, get_text = document_processor.chunk_document(file_content, document.file_type)
             
             # Store chunks
-            for idx, chunk_text in enumerate(chunks):
+            contents = []
+            for idx, chunk in enumerate(chunks):
                 chunk_id = str(uuid.uuid4())
+                contents.append(chunk.content)
+                point_ids.append(chunk_id)
                 
                 # Add to Qdrant
                 qdrant_service.add_document_chunk(
                     chunk_id=chunk_id,
-                    text=chunk_text,
+                    text=chunk.content,
                     document_id=document.id,
                     metadata={
                         "filename": document.original_filename,
                         "owner_id": document.owner_id,
-                        "chunk_index": idx
+                        "chunk_index": idx,
+                        "page_start": chunk.page_start,
+                        "page_end": chunk.page_end,
+                        "heading_path": chunk.heading_path,
+                        "section": chunk.heading_path[-1] if chunk.heading_path else None
                     }
                 )
                 
                 # Add to database
-                chunk = DocumentChunk(
+                db.add(DocumentChunk(
                     document_id=document.id,
                     chunk_index=idx,
-                    content=chunk_text,
-                    qdrant_point_id=chunk_id
+                    content=chunk.content,
+                    qdrant_point_id=chunk_id,
+                    start_offset=chunk.start,
+                    end_offset=chunk.end,
+                    page_start=chunk.page_start,
+                    page_end=chunk.page_end,
+                    heading_path=chunk.heading_path
+                ))
+            
+            # Cache the extracted text so preview doesn't re-download and re-parse the file
+            try:
+                extracted_text_service.save(document, get_text(), source_etag)
+            except Exception as e:
+                logger.error(f"Failed to cache extracted text for {document_id}: {e}")
+            
+            # Report chunks whose tail the embedding model would never see
+            truncated = document_processor.count_truncated_chunks(contents)
+            if truncated:
+                logger.warning(
+                    f"Document {document_id}: {truncated}/{len(contents)} chunks exceed the embedding "
+                    f"model's max_seq_length and will be truncated when embedded"
                 )
-                db.add(chunk)
+            elif truncated == 0:
+                logger.info(f"Document {document_id}: all {len(contents)} chunks fit the embedding model")
             
             document.status = "completed"
             db.commit()
@@ -81,11 +125,233 @@ def process_document_task(document_id: int):
 
         except Exception as e:
             logger.error(f"Processing failed for {document_id}: {e}")
+            # Chunks are written while extraction streams, so a parse error
+            # partway through leaves earlier chunks behind; discard them
+            db.rollback()
+            if point_ids:
+                try:
+                    qdrant_service.delete_document_chunks(point_ids)
+                except Exception as cleanup_error:
+                    logger.error(f"Failed to delete Qdrant points of {document_id}: {cleanup_error}")
             document.status = "failed"
             document.processing_error = str(e)
             db.commit()
 
     except Exception as e:
         logger.error(f"Task failed: {e}")
+    finally:
+        open_files.close()
+        db.close()
+        logger.info(
+            f"Document {document_id} peak worker memory: {_peak_rss_mb():.1f} MB "
+            f"(peak before task: {start_peak_rss:.1f} MB)"
+        )
+
+
+def _iter_export_documents(db, document_ids, batch_size: int = 500):
+    """Load documents with their tags in batches, yielding them in document_ids order"""
+    for batch_start in range(0, len(document_ids), batch_size):
+        batch = document_ids[batch_start:batch_start + batch_size]
+        documents = {
+            document.id: document
+            for document in db.query(Document)
+            .options(selectinload(Document.tags))
+            .filter(Document.id.in_(batch))
+        }
+        for doc_id in batch:
+            if doc_id in documents:
+                yield documents[doc_id]
+
+
+@shared_task(name="app.tasks.export_documents_task")
+def export_documents_task(job_id: str):
+    """Build an export file in the background and store it in MinIO"""
+    logger.info(f"Starting export job {job_id}")
+    db = SessionLocal()
+    try:
+        job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+        if not job:
+            logger.error(f"Export job {job_id} not found")
+            return
+
+        job.status = "running"
+        job.processed_documents = 0
+        db.commit()
+
+        last_report = time.monotonic()
+        processed = 0
+
+        def track_progress(documents):
+            # Counted as the exporter pulls each document, so progress follows the bytes written.
+            # Written on its own connection: committing db would expire the loaded documents.
+            nonlocal last_report, processed
+            for document in documents:
+                yield document
+                processed += 1
+                if time.monotonic() - last_report >= settings.export_progress_interval:
+                    with engine.begin() as connection:
+                        connection.execute(
+                            update(ExportJob)
+                            .where(ExportJob.id == job_id)
+                            .values(processed_documents=processed)
+                        )
+                    last_report = time.monotonic()
+
+        try:
+            content_type, filename = EXPORT_FORMATS[job.format]
+            object_name = f"exports/{job.id}/{filename}"
+            documents = track_progress(_iter_export_documents(db, job.document_ids))
+            file_size, _ = storage_service.upload_stream(
+                IterableStream(export_service.iter_export(job.format, documents)),
+                object_name,
+                content_type=content_type
+            )
+
+            if job.format == "zip":
+                db.add_all([
+                    DocumentAnalytics(document_id=doc_id, user_id=job.user_id, action="download")
+                    for doc_id in job.document_ids
+                ])
+
+            job.object_name = object_name
+            job.file_size = file_size
+            job.processed_documents = processed
+            job.status = "completed"
+            job.completed_at = datetime.utcnow()
+            db.commit()
+            logger.info(f"Export job {job_id} completed ({file_size} bytes)")
+
+        except Exception as e:
+            logger.error(f"Export job {job_id} failed: {e}")
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            job.completed_at = datetime.utcnow()
+            db.commit()
+
+    except Exception as e:
+        logger.error(f"Task failed: {e}")
+    finally:
+        db.close()
+
+
+@shared_task(name="app.tasks.cleanup_exports_task")
+def cleanup_exports_task():
+    """
+    Delete export files older than export_retention_hours from MinIO.
+
+    Finished jobs are kept and marked expired, so polling one reports that
+    its file is gone rather than handing out a dead link.
+    """
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(hours=settings.export_retention_hours)
+        jobs = db.execute(
+            select(ExportJob).where(
+                ExportJob.status.in_(["completed", "failed"]),
+                ExportJob.completed_at < cutoff
+            )
+        ).scalars().all()
+
+        for job in jobs:
+            if job.object_name:
+                try:
+                    storage_service.delete_file(job.object_name)
+                except Exception as e:
+                    # Keep the job so the next run tries again
+                    logger.error(f"Could not delete export {job.object_name}: {e}")
+                    continue
+            job.status = "expired"
+            job.object_name = None
+            db.commit()
+
+        if jobs:
+            logger.info(f"Expired {len(jobs)} export jobs older than {cutoff}")
+    except Exception as e:
+        logger.error(f"Export cleanup failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _rollup_analytics_day(db, day: date) -> int:
+    """Replace the rollup rows of one UTC day from raw events (not committed); returns the number of rows"""
+    day_start = datetime.combine(day, dt_time.min)
+    rows = db.execute(
+        select(
+            DocumentAnalytics.document_id,
+            DocumentAnalytics.action,
+            func.count(DocumentAnalytics.id)
+        )
+        .where(
+            DocumentAnalytics.timestamp >= day_start,
+            DocumentAnalytics.timestamp < day_start + timedelta(days=1)
+        )
+        .group_by(DocumentAnalytics.document_id, DocumentAnalytics.action)
+    ).all()
+
+    db.execute(delete(AnalyticsDailyRollup).where(AnalyticsDailyRollup.day == day))
+    db.add_all([
+        AnalyticsDailyRollup(document_id=document_id, action=action, day=day, count=count)
+        for document_id, action, count in rows
+    ])
+    return len(rows)
+
+
+@shared_task(name="app.tasks.rollup_analytics_task")
+def rollup_analytics_task():
+    """
+    Bring analytics_daily_rollups up to yesterday (UTC).
+
+    The watermark in analytics_rollup_state records the last rolled-up day
+    (advanced through days without events too) and the highest raw event id
+    seen. Each run rolls up the days after the watermark, and again any
+    earlier day that received events since the last run (events are written
+    in delayed batches, so a day can still grow after it was rolled up).
+    Each day is its own transaction, so an interrupted backfill resumes
+    where it stopped.
+    """
+    db = SessionLocal()
+    try:
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        # Events with a higher id arrive after this run and are picked up by the next one
+        max_event_id = db.execute(select(func.max(DocumentAnalytics.id))).scalar()
+        if max_event_id is None:
+            return
+
+        state = db.get(AnalyticsRollupState, 1)
+        if state is None:
+            # First run: start at the first event, or redo the last day of
+            # rollups made before the watermark row existed
+            last_rolled = db.execute(select(func.max(AnalyticsDailyRollup.day))).scalar()
+            if last_rolled is None:
+                last_rolled = db.execute(select(func.min(DocumentAnalytics.timestamp))).scalar().date()
+            rolled_until = last_rolled - timedelta(days=1)
+            state = AnalyticsRollupState(id=1, rolled_until=rolled_until, last_event_id=0)
+            db.add(state)
+            db.commit()
+
+        day = state.rolled_until + timedelta(days=1)
+        late_event = db.execute(
+            select(func.min(DocumentAnalytics.timestamp)).where(
+                DocumentAnalytics.id > state.last_event_id,
+                DocumentAnalytics.id <= max_event_id
+            )
+        ).scalar()
+        if late_event is not None and state.last_event_id:
+            day = min(day, late_event.date())
+
+        while day <= yesterday:
+            rows = _rollup_analytics_day(db, day)
+            state.rolled_until = max(state.rolled_until, day)
+            db.commit()
+            logger.info(f"Rolled up analytics for {day}: {rows} rows")
+            day += timedelta(days=1)
+
+        state.last_event_id = max_event_id
+        db.commit()
+    except Exception as e:
+        logger.error(f"Analytics rollup failed: {e}")
+        db.rollback()
     finally:
         db.close()
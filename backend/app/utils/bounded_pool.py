@@ -0,0 +1,89 @@
+"""
+Bounded thread pool for CPU-heavy blocking calls made from async handlers
+
+Runs calls on a fixed number of threads so they do not block the event
+loop, rejects new calls once too many are waiting instead of queueing
+without limit, and records how long calls wait for a thread and run.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class PoolBusyError(Exception):
+    """The pool already has max_pending calls waiting or running"""
+
+
+class BoundedThreadPool:
+    """Thread pool with a cap on outstanding calls and queue-wait metrics"""
+
+    def __init__(self, name: str, workers: int, max_pending: int):
+        """
+        Initialize the pool.
+
+        Args:
+            name: Thread name prefix, also used in metrics
+            workers: Threads running calls concurrently
+            max_pending: Calls allowed to wait or run at once before
+                run() raises PoolBusyError (0 means no limit)
+        """
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) on the pool and return its result"""
+        with self._lock:
+            if self.max_pending and self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolBusyError(f"{self.name} pool has {self.pending} calls pending")
+            self.pending += 1
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    wait = started - submitted
+                    self.total_wait += wait
+                    self.max_wait = max(self.max_wait, wait)
+                    self.total_run += finished - started
+                    self.completed += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Load and timing counters (seconds)"""
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_queue_wait": self.total_wait / completed if completed else 0.0,
+                "max_queue_wait": self.max_wait,
+                "avg_run_time": self.total_run / completed if completed else 0.0,
+            }
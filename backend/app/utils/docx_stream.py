@@ -0,0 +1,145 @@
+"""
+Streaming DOCX text extraction
+
+Reads word/document.xml with an incremental XML parser instead of building
+the python-docx object model, so memory stays flat for documents with
+thousands of paragraphs or table rows.
+"""
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Dict, Iterator, List
+
+from app.utils.structured_chunker import TextBlock
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_P = W_NS + "p"
+W_T = W_NS + "t"
+W_TAB = W_NS + "tab"
+W_BR = W_NS + "br"
+W_CR = W_NS + "cr"
+W_BODY = W_NS + "body"
+W_TBL = W_NS + "tbl"
+W_TR = W_NS + "tr"
+W_TC = W_NS + "tc"
+W_PPR = W_NS + "pPr"
+W_PSTYLE = W_NS + "pStyle"
+W_NUMPR = W_NS + "numPr"
+W_STYLE = W_NS + "style"
+W_NAME = W_NS + "name"
+W_VAL = W_NS + "val"
+W_STYLE_ID = W_NS + "styleId"
+
+# Style names as stored in styles.xml ("heading 1", "Title", "List Bullet")
+HEADING_STYLE = re.compile(r"^heading (\d)$", re.IGNORECASE)
+
+
+def read_style_names(docx: zipfile.ZipFile) -> Dict[str, str]:
+    """Map paragraph style ids (e.g. "Heading1") to style names (e.g. "heading 1")"""
+    try:
+        with docx.open("word/styles.xml") as styles_file:
+            root = ET.parse(styles_file).getroot()
+    except KeyError:
+        return {}
+
+    names = {}
+    for style in root.iter(W_STYLE):
+        name = style.find(W_NAME)
+        if name is not None:
+            names[style.get(W_STYLE_ID)] = name.get(W_VAL, "")
+    return names
+
+
+def _paragraph_block(text: str, style_name: str, numbered: bool) -> TextBlock:
+    heading = HEADING_STYLE.match(style_name)
+    if heading and text.strip():
+        return TextBlock(text, kind="heading", heading_level=int(heading.group(1)))
+    if style_name.lower() == "title" and text.strip():
+        return TextBlock(text, kind="heading", heading_level=1)
+    if numbered or style_name.lower().startswith("list"):
+        return TextBlock(text, kind="list_item")
+    return TextBlock(text)
+
+
+def iter_docx_blocks(file: IO[bytes]) -> Iterator[TextBlock]:
+    """
+    Yield paragraphs and table rows of a DOCX file in document order.
+
+    Paragraphs are classified by style (headings, list items). Each table
+    row becomes one block with its cells joined by " | "; nested tables are
+    folded into the enclosing cell. Elements are discarded as soon as they
+    are emitted.
+
+    Args:
+        file: Seekable binary file containing the DOCX (zip) archive
+    """
+    with zipfile.ZipFile(file) as docx:
+        style_names = read_style_names(docx)
+        with docx.open("word/document.xml") as document_xml:
+            yield from _iter_body(document_xml, style_names)
+
+
+def _iter_body(document_xml: IO[bytes], style_names: Dict[str, str]) -> Iterator[TextBlock]:
+    body = None
+    text_parts: List[str] = []
+    style_id = None
+    numbered = False
+    in_properties = False  # Inside <w:pPr>, where <w:tab> is a tab stop, not text
+    # One entry per open table: cells of the current row, paragraphs of the current cell
+    rows: List[List[str]] = []
+    cells: List[List[str]] = []
+    tables = []  # Open <w:tbl> elements, cleared row by row
+
+    for event, elem in ET.iterparse(document_xml, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == W_BODY:
+                body = elem
+            elif tag == W_P:
+                text_parts, style_id, numbered = [], None, False
+            elif tag == W_TBL:
+                rows.append([])
+                tables.append(elem)
+            elif tag == W_TC:
+                cells.append([])
+            elif tag == W_PPR:
+                in_properties = True
+            continue
+
+        if tag == W_T:
+            text_parts.append(elem.text or "")
+        elif tag == W_PPR:
+            in_properties = False
+        elif in_properties:
+            # The first pStyle is the current one; later ones are tracked changes
+            if tag == W_PSTYLE and style_id is None:
+                style_id = elem.get(W_VAL)
+            elif tag == W_NUMPR:
+                numbered = True
+        elif tag == W_TAB:
+            text_parts.append("\t")
+        elif tag in (W_BR, W_CR):
+            text_parts.append("\n")
+        elif tag == W_P:
+            text = "".join(text_parts)
+            if cells:
+                cells[-1].append(text)
+            else:
+                yield _paragraph_block(text, style_names.get(style_id, style_id or ""), numbered)
+        elif tag == W_TC:
+            rows[-1].append("\n".join(cells.pop()).strip())
+        elif tag == W_TR:
+            row_text = " | ".join(rows[-1])
+            rows[-1] = []
+            if cells:
+                cells[-1].append(row_text)
+            else:
+                yield TextBlock(row_text, kind="table_row")
+            tables[-1].clear()
+        elif tag == W_TBL:
+            rows.pop()
+            tables.pop()
+
+        # Drop finished top-level elements so the tree never holds the whole body
+        if tag in (W_P, W_TBL) and body is not None and not rows:
+            body.clear()
@@ -0,0 +1,54 @@
+"""
+HTTP Range header parsing for ranged file downloads
+"""
+from typing import Optional, Tuple
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range lies outside the resource"""
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range: bytes=...`` header.
+
+    Supports "bytes=start-end", "bytes=start-" and suffix ranges "bytes=-n".
+    Multi-range and malformed headers are ignored (None), in which case the
+    whole resource is served, as RFC 9110 allows.
+
+    Args:
+        header: Value of the Range header (or None)
+        size: Size of the resource in bytes
+
+    Returns:
+        Inclusive (start, end) byte positions, or None to serve everything
+
+    Raises:
+        RangeNotSatisfiable: If the range starts beyond the end of the resource
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+    else:
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable(header)
+        start = max(size - suffix, 0)
+        end = size - 1
+
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
@@ -2,7 +2,7 @@ import os
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import User
-from app.services.auth_service import get_password_hash
+from app.services.auth_service import get_password_hash_async
 from database import async_session_maker
 
 async def ensure_default_admin():
@@ -28,7 +28,7 @@ async def ensure_default_admin():
             admin_password = "admin123"
             
             # Create admin user
-            hashed_password = get_password_hash(admin_password)
+            hashed_password = await get_password_hash_async(admin_password)
             admin_user = User(
                 username=admin_username,
                 email=admin_email,
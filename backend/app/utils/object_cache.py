@@ -0,0 +1,150 @@
+"""
+Local read-through disk cache for storage objects
+
+Objects are stored one file per (object name, ETag) so a changed object is
+never served stale, and the cache is bounded by total size with
+least-recently-used eviction (file mtime is the access clock). Files are
+written to a temporary name and renamed into place, so several worker
+processes can share the directory.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class MappedFile(mmap.mmap):
+    """
+    Read-only memory map of a cached file.
+
+    Supports the buffer protocol (slicing, len) as well as read/seek/tell,
+    so it can be passed to parsers that expect a seekable binary stream
+    without copying the file into memory.
+    """
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return False
+
+
+def open_mapped(path: str) -> Union[MappedFile, bytes]:
+    """Memory-map a file read-only (empty files cannot be mapped and return b"")"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        # The mapping stays valid after the file is closed, or even evicted
+        return MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ObjectCache:
+    """Size-bounded on-disk cache of storage objects keyed by name and ETag"""
+
+    SUFFIX = ".obj"
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Directory holding cached files (created if missing)
+            max_bytes: Maximum total size of cached files before eviction
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, object_name: str, etag: str) -> Path:
+        key = hashlib.sha256(f"{object_name}\0{etag}".encode("utf-8")).hexdigest()
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def get(self, object_name: str, etag: str) -> Optional[str]:
+        """Path of the cached object, or None on a miss"""
+        path = self._path(object_name, etag)
+        try:
+            # Touch it: mtime is the LRU clock
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return str(path)
+
+    def put(self, object_name: str, etag: str, chunks: Iterable[bytes]) -> str:
+        """Write an object's content to the cache and return its path"""
+        path = self._path(object_name, etag)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict(keep=path)
+        return str(path)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Delete least recently used files until the cache fits max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, path, size in entries:
+                if total <= self.max_bytes:
+                    break
+                if keep is not None and path == str(keep):
+                    continue
+                try:
+                    os.unlink(path)
+                    total -= size
+                except FileNotFoundError:
+                    # Already evicted by another worker
+                    total -= size
+            logger.debug(f"Object cache evicted down to {total} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit-rate counters (this process only; the directory may be shared)"""
+        lookups = self.hits + self.misses
+        return {
+            "size_bytes": self.total_size(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def total_size(self) -> int:
+        """Total size in bytes of all cached files"""
+        return sum(
+            entry.stat().st_size
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(self.SUFFIX)
+        )
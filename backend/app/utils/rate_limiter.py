@@ -0,0 +1,43 @@
+"""
+Thread-safe token bucket rate limiter
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket that refills at a fixed rate up to a burst capacity"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Initialize the token bucket.
+
+        Args:
+            rate: Tokens added per second (<= 0 disables limiting)
+            capacity: Maximum number of tokens that can accumulate
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested number of tokens is available"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
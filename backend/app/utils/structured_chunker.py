@@ -0,0 +1,266 @@
+"""
+Structure-aware chunker - splits documents at heading boundaries
+"""
+from itertools import accumulate
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class TextBlock(NamedTuple):
+    """A unit of document structure: a heading, paragraph, list item or table row"""
+    text: str
+    kind: str = "paragraph"  # heading, paragraph, list_item, table_row
+    heading_level: int = 0  # 1-9 for headings, 0 otherwise
+    title: Optional[str] = None  # Heading text without markup (defaults to text)
+
+
+class TextChunk(NamedTuple):
+    """A chunk with its position in the extracted text and source location"""
+    content: str
+    start: int
+    end: int
+    heading_path: Optional[List[str]] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+
+
+class _SectionBlock(NamedTuple):
+    text: str
+    kind: str
+    offset: int  # Position in the extracted text
+    length: int  # Measured with the splitter's length_function
+
+
+# Runs of these blocks are kept together in one chunk when they fit, and
+# otherwise split between blocks, never inside a row or item
+RUN_KINDS = ("table_row", "list_item", "code")
+
+
+class StructuredChunker:
+    """
+    Chunk a stream of TextBlocks section by section.
+
+    The extracted text is the blocks joined with "\\n". Each section (a
+    heading and the blocks up to the next heading) is chunked on its own,
+    so chunks never straddle sections, and every chunk carries the path of
+    headings above it. A heading with no body of its own is chunked with
+    the section below it.
+
+    Within a section, blocks are packed into chunks of up to the splitter's
+    chunk_size, measured with its length_function (characters or tokens).
+    A table, list or code block is kept in one chunk when it fits and is
+    otherwise split between rows or items; headings stay with the block
+    that follows them. Only a single block longer than chunk_size is split
+    inside, with the offset-tracking splitter. Consecutive chunks overlap by
+    whole blocks, up to chunk_overlap.
+
+    Chunks are yielded as soon as their section ends, and very long sections
+    are flushed at block boundaries, so only one section's blocks are held
+    at a time. After iteration, ``text`` holds the full extracted text.
+    """
+
+    def __init__(self, text_splitter, flush_factor: int = 8):
+        """
+        Initialize the chunker.
+
+        Args:
+            text_splitter: OffsetTrackingTextSplitter whose chunk_size,
+                chunk_overlap and length_function are used, and which splits
+                blocks longer than chunk_size
+            flush_factor: Flush a section once it exceeds this many chunk sizes
+        """
+        self.text_splitter = text_splitter
+        self.flush_factor = flush_factor
+        self._parts: List[str] = []
+        self.text: Optional[str] = None
+
+    def chunk(self, blocks: Iterable[TextBlock]) -> Iterator[TextChunk]:
+        """Consume blocks and yield chunks in document order"""
+        self._parts = []
+        self.text = None
+        measure = self.text_splitter.length_function
+        separator_length = measure("\n")
+        heading_stack: List[Tuple[int, str]] = []
+        section: List[_SectionBlock] = []
+        section_has_body = False
+        offset = 0
+        flush_length = self.text_splitter.chunk_size * self.flush_factor
+        section_length = 0
+
+        for block in blocks:
+            if block.kind == "heading":
+                if section_has_body:
+                    yield from self._emit(section, heading_stack)
+                    section, section_has_body, section_length = [], False, 0
+                # A heading with no body yet stays in the buffer and is
+                # chunked together with the section below it
+                while heading_stack and heading_stack[-1][0] >= block.heading_level:
+                    heading_stack.pop()
+                heading_stack.append((block.heading_level, (block.title or block.text).strip()))
+            elif block.text.strip():
+                section_has_body = True
+
+            length = measure(block.text)
+            section.append(_SectionBlock(block.text, block.kind, offset, length))
+            section_length += length + separator_length
+            self._parts.append(block.text)
+            offset += len(block.text) + 1
+
+            if section_has_body and section_length > flush_length:
+                yield from self._emit(section, heading_stack)
+                section, section_has_body, section_length = [], False, 0
+
+        if section:
+            yield from self._emit(section, heading_stack)
+
+        self.text = "\n".join(self._parts)
+        self._parts = []
+
+    def _emit(
+        self,
+        section: List[_SectionBlock],
+        heading_stack: List[Tuple[int, str]]
+    ) -> Iterator[TextChunk]:
+        heading_path = [title for _, title in heading_stack]
+        totals = list(accumulate((block.length for block in section), initial=0))
+        separator_length = self.text_splitter.length_function("\n")
+
+        def span_length(lo: int, hi: int) -> int:
+            return totals[hi] - totals[lo] + separator_length * (hi - lo - 1)
+
+        units = self._units(section, 0, len(section), group_runs=True)
+        for lo, hi, fits in self._pack(section, units, span_length):
+            if fits:
+                chunk = self._block_chunk(section, lo, hi, heading_path)
+                if chunk is not None:
+                    yield chunk
+            else:
+                yield from self._split_unit(section, lo, hi, heading_path)
+
+    def _pack(
+        self,
+        section: List[_SectionBlock],
+        units: List[Tuple[int, int]],
+        span_length: Callable[[int, int], int],
+        group_runs: bool = True
+    ) -> Iterator[Tuple[int, int, bool]]:
+        """
+        Pack consecutive units into chunk_size and yield (lo, hi, fits) block
+        ranges; fits is False for a single block too long for one chunk
+        """
+        chunk_size = self.text_splitter.chunk_size
+        lo = hi = None
+        for unit_lo, unit_hi in units:
+            if lo is not None:
+                if span_length(lo, unit_hi) <= chunk_size:
+                    hi = unit_hi
+                    continue
+                yield lo, hi, True
+                overlap_lo = self._overlap_start(lo, hi, span_length)
+                if span_length(overlap_lo, unit_hi) <= chunk_size:
+                    lo, hi = overlap_lo, unit_hi
+                    continue
+                lo = hi = None
+            if span_length(unit_lo, unit_hi) <= chunk_size:
+                lo, hi = unit_lo, unit_hi
+            elif group_runs:
+                # A run too long for one chunk is packed row by row
+                yield from self._pack(
+                    section, self._units(section, unit_lo, unit_hi, group_runs=False), span_length, False
+                )
+            else:
+                yield unit_lo, unit_hi, False
+        if lo is not None:
+            yield lo, hi, True
+
+    @staticmethod
+    def _units(section: List[_SectionBlock], lo: int, hi: int, group_runs: bool) -> List[Tuple[int, int]]:
+        """
+        Group blocks [lo, hi) into the ranges packed whole: a single block, or
+        a run of table rows, list items or code lines when group_runs, each
+        with the headings and blank lines before it
+        """
+        units = []
+        start = index = lo
+        while index < hi:
+            kind = section[index].kind
+            index += 1
+            if group_runs and kind in RUN_KINDS:
+                while index < hi and section[index].kind == kind:
+                    index += 1
+            elif kind == "heading" or not section[index - 1].text.strip():
+                continue
+            units.append((start, index))
+            start = index
+        if start < hi:
+            # Trailing headings or blank lines join the unit before them
+            if units:
+                units[-1] = (units[-1][0], hi)
+            else:
+                units.append((start, hi))
+        return units
+
+    def _overlap_start(self, lo: int, hi: int, span_length: Callable[[int, int], int]) -> int:
+        """Start of the trailing blocks of [lo, hi) that fit in chunk_overlap (hi if none)"""
+        start = hi
+        while start - 1 > lo and span_length(start - 1, hi) <= self.text_splitter.chunk_overlap:
+            start -= 1
+        return start
+
+    @staticmethod
+    def _block_chunk(
+        section: List[_SectionBlock],
+        lo: int,
+        hi: int,
+        heading_path: List[str]
+    ) -> Optional[TextChunk]:
+        """Chunk of blocks [lo, hi) without leading or trailing blank lines (None if all blank)"""
+        while lo < hi and not section[lo].text.strip():
+            lo += 1
+        while hi > lo and not section[hi - 1].text.strip():
+            hi -= 1
+        if lo == hi:
+            return None
+        last = section[hi - 1]
+        return TextChunk(
+            content="\n".join(block.text for block in section[lo:hi]),
+            start=section[lo].offset,
+            end=last.offset + len(last.text),
+            heading_path=heading_path
+        )
+
+    def _split_unit(
+        self,
+        section: List[_SectionBlock],
+        lo: int,
+        hi: int,
+        heading_path: List[str]
+    ) -> Iterator[TextChunk]:
+        """
+        Split a unit holding one block longer than chunk_size with the text
+        splitter. Headings before the block are kept at the start of its first
+        chunk rather than chunked on their own, so that chunk can exceed
+        chunk_size by their length.
+        """
+        body = max(range(lo, hi), key=lambda index: section[index].length)
+        pieces = self.text_splitter.split_text_with_offsets(section[body].text)
+        if not pieces:
+            return
+        unit_text = "\n".join(block.text for block in section[lo:hi])
+        unit_offset = section[lo].offset
+        first = next(index for index in range(lo, hi) if section[index].text.strip())
+        last = next(index for index in range(hi - 1, lo - 1, -1) if section[index].text.strip())
+        body_start = section[body].offset - unit_offset
+
+        for position, (_, start, end) in enumerate(pieces):
+            start += body_start
+            end += body_start
+            if position == 0:
+                start = section[first].offset - unit_offset
+            if position == len(pieces) - 1:
+                end = section[last].offset - unit_offset + len(section[last].text)
+            yield TextChunk(
+                content=unit_text[start:end],
+                start=unit_offset + start,
+                end=unit_offset + end,
+                heading_path=heading_path
+            )
@@ -1,7 +1,8 @@
 """
 Lightweight text splitter - replaces langchain's RecursiveCharacterTextSplitter
 """
-from typing import List
+from itertools import accumulate
+from typing import List, Tuple
 
 
 class RecursiveCharacterTextSplitter:
@@ -154,3 +155,173 @@ class RecursiveCharacterTextSplitter:
                 chunks.append(chunk_text)
         
         return chunks
+
+
+class OffsetTrackingTextSplitter:
+    """
+    Recursive character splitter that tracks where each chunk came from.
+
+    Produces exactly the same chunks as RecursiveCharacterTextSplitter, but
+    works on (start, end) offsets into the original text instead of building
+    sub-splitters, re-joining lists and copying substrings at every level.
+    Every chunk is a contiguous slice of the input, so its offsets can be
+    stored and used to locate it later without searching.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        separators: List[str] = None,
+        length_function=len
+    ):
+        """
+        Initialize the text splitter.
+
+        Args:
+            chunk_size: Maximum size of each chunk
+            chunk_overlap: Number of characters to overlap between chunks
+            separators: List of separators to use for splitting (in priority order)
+            length_function: Function to calculate text length
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_function = length_function
+        self.separators = separators or ["\n\n", "\n", ". ", " ", ""]
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks (compatible with RecursiveCharacterTextSplitter)."""
+        return [chunk for chunk, _, _ in self.split_text_with_offsets(text)]
+
+    def split_text_with_offsets(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Split text into chunks and report their position in the text.
+
+        Args:
+            text: The text to split
+
+        Returns:
+            List of (chunk, start, end) tuples where text[start:end] == chunk
+        """
+        if not text:
+            return []
+
+        chunks = []
+        self._split(text, 0, len(text), self.separators, chunks)
+        return chunks
+
+    def _length(self, text: str, start: int, end: int) -> int:
+        if self.length_function is len:
+            return end - start
+        return self.length_function(text[start:end])
+
+    def _split(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        separators: List[str],
+        chunks: List[Tuple[str, int, int]]
+    ):
+        """Split text[start:end], appending (chunk, start, end) tuples to chunks."""
+        # Pick the first separator present in this span, like split_text does
+        separator = separators[-1]
+        new_separators = []
+        for i, sep in enumerate(separators):
+            if sep == "":
+                separator = sep
+                break
+            if text.find(sep, start, end) != -1:
+                separator = sep
+                new_separators = separators[i + 1:]
+                break
+
+        for chunk_start, chunk_end in self._merge_splits(text, start, end, separator):
+            if new_separators and self._length(text, chunk_start, chunk_end) > self.chunk_size:
+                self._split(text, chunk_start, chunk_end, new_separators, chunks)
+            else:
+                chunks.append((text[chunk_start:chunk_end], chunk_start, chunk_end))
+
+    def _split_offsets(self, text: str, start: int, end: int, separator: str):
+        """
+        Describe the pieces str.split(separator) returns for text[start:end].
+
+        Returns:
+            Parallel sequences (starts, ends, lengths) where lengths are
+            measured with length_function
+        """
+        if not separator:
+            starts = range(start, end)
+            ends = range(start + 1, end + 1)
+            if self.length_function is len:
+                lengths = [1] * (end - start)
+            else:
+                lengths = self._measure(list(text[start:end]))
+            return starts, ends, lengths
+
+        pieces = text[start:end].split(separator)
+        char_lengths = list(map(len, pieces))
+        step = len(separator)
+        starts = list(accumulate((n + step for n in char_lengths[:-1]), initial=start))
+        ends = [s + n for s, n in zip(starts, char_lengths)]
+        if self.length_function is len:
+            lengths = char_lengths
+        else:
+            lengths = self._measure(pieces)
+        return starts, ends, lengths
+
+    def _measure(self, pieces: List[str]) -> List[int]:
+        """Measure pieces, in one batch when the length function supports it (see TokenCounter)"""
+        count_many = getattr(self.length_function, "count_many", None)
+        if count_many is not None:
+            return count_many(pieces)
+        return list(map(self.length_function, pieces))
+
+    def _merge_splits(self, text: str, start: int, end: int, separator: str) -> List[Tuple[int, int]]:
+        """
+        Merge the splits of text[start:end] into chunk offsets, following the
+        same rules as RecursiveCharacterTextSplitter._merge_splits.
+
+        The current chunk is always the contiguous run of splits
+        [low, high), so it is tracked with two indices instead of a list.
+        """
+        starts, ends, lengths = self._split_offsets(text, start, end, separator)
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        separator_len = self.length_function(separator)
+
+        chunks = []
+        low = high = 0
+        current_length = 0
+
+        for split_len in lengths:
+            if current_length + split_len + (separator_len if high > low else 0) > chunk_size:
+                if high > low:
+                    chunk_start, chunk_end = starts[low], ends[high - 1]
+                    if chunk_end > chunk_start:
+                        chunks.append((chunk_start, chunk_end))
+
+                    # Start new chunk with the trailing splits that fit in the overlap
+                    if self._length(text, chunk_start, chunk_end) > chunk_overlap:
+                        overlap_len = 0
+                        new_low = high
+                        for j in range(high - 1, low - 1, -1):
+                            if overlap_len + lengths[j] > chunk_overlap:
+                                break
+                            new_low = j
+                            overlap_len += lengths[j] + separator_len
+                        low = new_low
+                        current_length = overlap_len - separator_len if high > low else 0
+                    else:
+                        low = high
+                        current_length = 0
+
+            high += 1
+            current_length += split_len + (separator_len if high - low > 1 else 0)
+
+        if high > low:
+            chunk_start, chunk_end = starts[low], ends[high - 1]
+            if chunk_end > chunk_start:
+                chunks.append((chunk_start, chunk_end))
+
+        return chunks
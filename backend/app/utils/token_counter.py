@@ -0,0 +1,72 @@
+"""
+Cached, batched token counting for length-aware text splitting
+"""
+from collections import OrderedDict
+from typing import List
+
+
+class TokenCounter:
+    """Count tokens with a Hugging Face tokenizer, caching results per text"""
+
+    def __init__(self, tokenizer, cache_size: int = 100000, batch_size: int = 256, max_cached_length: int = 10000):
+        """
+        Initialize the token counter.
+
+        Args:
+            tokenizer: Hugging Face tokenizer (e.g. SentenceTransformer.tokenizer)
+            cache_size: Maximum number of cached texts
+            batch_size: Number of texts tokenized per tokenizer call
+            max_cached_length: Texts longer than this (in characters) are not cached
+        """
+        self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.max_cached_length = max_cached_length
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+
+    def _tokenize(self, texts: List[str]) -> List[int]:
+        encoded = self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def _remember(self, text: str, count: int):
+        if len(text) > self.max_cached_length:
+            return
+        self._cache[text] = count
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def __call__(self, text: str) -> int:
+        """Number of tokens in text, excluding special tokens"""
+        return self.count_many([text])[0]
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Token counts for several texts, tokenizing cache misses in batches"""
+        counts = [None] * len(texts)
+        missing = {}
+        for i, text in enumerate(texts):
+            if not text:
+                counts[i] = 0
+            elif text in self._cache:
+                self._cache.move_to_end(text)
+                counts[i] = self._cache[text]
+            else:
+                missing.setdefault(text, []).append(i)
+
+        unique_missing = list(missing)
+        for batch_start in range(0, len(unique_missing), self.batch_size):
+            batch = unique_missing[batch_start:batch_start + self.batch_size]
+            for text, count in zip(batch, self._tokenize(batch)):
+                self._remember(text, count)
+                for i in missing[text]:
+                    counts[i] = count
+
+        return counts
+
+    def num_special_tokens(self) -> int:
+        """Special tokens the tokenizer adds to a single sequence (e.g. [CLS] and [SEP])"""
+        return self.tokenizer.num_special_tokens_to_add(pair=False)
@@ -0,0 +1,95 @@
+"""
+Streaming ZIP writer
+
+Builds a ZIP archive on the fly from iterables of chunks and yields the
+archive bytes as they are produced, so archives of any size can be sent
+without holding them in memory. Entries are written with data descriptors
+(the sizes and CRC follow the data), which zipfile does automatically for
+unseekable outputs.
+"""
+import time
+import zipfile
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+
+class ZipEntry(NamedTuple):
+    """A file to add to a streamed archive"""
+    name: str
+    chunks: Iterable[bytes]
+    compress_type: int = zipfile.ZIP_DEFLATED
+    size: Optional[int] = None  # Expected size, used to decide whether ZIP64 is needed
+
+
+class _StreamSink:
+    """Unseekable file-like object that collects what ZipFile writes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.buffered = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        self.buffered += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.buffered = 0
+        return data
+
+
+def unique_name(name: str, used: set) -> str:
+    """Return name, or "stem (n).ext" if it is already in used; records the result"""
+    candidate = name
+    stem, dot, ext = name.rpartition(".")
+    if not dot:
+        stem, ext = name, ""
+    n = 2
+    while candidate in used:
+        candidate = f"{stem} ({n}){dot}{ext}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+def stream_zip(
+    entries: Iterable[ZipEntry],
+    compresslevel: Optional[int] = None,
+    buffer_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive containing entries, in order, as it is written.
+
+    Each entry's chunks are pulled lazily, so entries can stream from
+    storage. Duplicate names get a " (n)" suffix.
+
+    Args:
+        entries: Files to add, in archive order
+        compresslevel: zlib level for deflated entries (None for the default)
+        buffer_size: Yield once at least this many archive bytes are pending
+    """
+    sink = _StreamSink()
+    used_names = set()
+    with zipfile.ZipFile(sink, mode="w", compresslevel=compresslevel) as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(unique_name(entry.name, used_names), time.localtime()[:6])
+            info.compress_type = entry.compress_type
+            info.external_attr = 0o644 << 16
+            force_zip64 = entry.size is None or entry.size >= zipfile.ZIP64_LIMIT
+            with archive.open(info, mode="w", force_zip64=force_zip64) as dest:
+                for chunk in entry.chunks:
+                    dest.write(chunk)
+                    if sink.buffered >= buffer_size:
+                        yield sink.drain()
+    # Closing the archive writes the last data descriptor and the central directory
+    if sink.buffered:
+        yield sink.drain()
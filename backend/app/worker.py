@@ -9,5 +9,22 @@ celery_app = Celery(
 )
 
 celery_app.conf.task_routes = {
-    "app.tasks.process_document_task": "main-queue"
+    "app.tasks.process_document_task": "main-queue",
+    # Exports run on their own queue so a dedicated worker can serve them
+    "app.tasks.export_documents_task": "export-queue",
+    # Short periodic maintenance, kept off the OCR-bound main queue
+    "app.tasks.rollup_analytics_task": "export-queue",
+    "app.tasks.cleanup_exports_task": "export-queue"
+}
+
+# Periodic tasks, run by the celery beat service
+celery_app.conf.beat_schedule = {
+    "rollup-analytics": {
+        "task": "app.tasks.rollup_analytics_task",
+        "schedule": settings.analytics_rollup_interval,
+    },
+    "cleanup-exports": {
+        "task": "app.tasks.cleanup_exports_task",
+        "schedule": settings.export_cleanup_interval,
+    },
 }
@@ -19,6 +19,12 @@ class Settings(BaseSettings):
     # - "paraphrase-MiniLM-L3-v2": 60MB, lighter and faster
     # - "paraphrase-multilingual-MiniLM-L12-v2": 420MB, for multilingual (Vietnamese support)
     embedding_model_name: str = "all-MiniLM-L6-v2"
+
+    # Chunking Configuration
+    chunking_mode: str = "characters"  # characters or tokens (measured with the embedding model's tokenizer)
+    chunk_size: Optional[int] = None  # Default: 1000 characters, or the model's max_seq_length in tokens mode
+    chunk_overlap: Optional[int] = None  # Default: 200 characters, or a fifth of chunk_size in tokens mode
+    structured_chunking: bool = True  # Chunk Markdown/DOCX by heading section and record each chunk's heading path
     
     # Database Configuration
     database_url: str = "sqlite+aiosqlite:///./documents.db"
@@ -40,6 +46,21 @@ class Settings(BaseSettings):
     ocr_dpi: int = 200
     ocr_temperature: float = 0.1
     ocr_max_tokens: int = 4000
+    ocr_min_page_chars: int = 50  # Pages with less embedded text than this are OCR'd
+    ocr_concurrency: int = 4  # Pages OCR'd in parallel
+    ocr_page_window: int = 4  # Pages per pdftoppm call; up to ocr_concurrency + this many page images wait on disk
+    ocr_rasterize_threads: int = 2  # pdftoppm threads per window
+    ocr_rate_limit: float = 2.0  # Requests per second to the OCR endpoint (0 disables)
+    ocr_rate_burst: int = 4
+    ocr_max_retries: int = 3  # Retries on 429/5xx and connection errors
+    ocr_retry_base_delay: float = 1.0
+    ocr_retry_max_delay: float = 30.0
+    ocr_image_format: str = "png"  # png, jpeg or webp
+    ocr_image_quality: int = 85  # For jpeg/webp
+    ocr_image_grayscale: bool = False
+    ocr_image_max_pixels: int = 0  # Downscale pages above this many pixels (0 disables)
+    ocr_cache_path: str = "/var/cache/qdrant-cms/ocr_cache.db"  # Empty disables the OCR result cache
+    ocr_cache_max_bytes: int = 100000000  # 100MB
 
     # MinIO Configuration
     minio_endpoint: str = "minio:9000"
@@ -47,6 +68,37 @@ class Settings(BaseSettings):
     minio_secret_key: str = "minioadmin"
     minio_bucket_name: str = "documents"
     minio_secure: bool = False
+    minio_public_endpoint: Optional[str] = None  # Host used in presigned URLs (default: minio_endpoint)
+    minio_public_secure: bool = False
+    minio_region: str = "us-east-1"
+    presigned_url_expire_seconds: int = 300
+    storage_cache_dir: str = "/var/cache/qdrant-cms/storage"  # Local read-through cache of MinIO objects (empty disables)
+    storage_cache_max_bytes: int = 2000000000  # 2GB
+    upload_part_size: int = 10 * 1024 * 1024  # Multipart upload part size (MinIO minimum is 5MB)
+
+    # Export jobs
+    export_progress_interval: float = 1.0  # Seconds between progress updates written by export jobs
+    export_retention_hours: int = 24  # Finished export files are deleted from MinIO after this long
+    export_cleanup_interval: float = 3600.0  # Seconds between export cleanup runs (celery beat)
+
+    # Permission cache (per process; other processes see changes after the TTL)
+    permission_cache_ttl: float = 30.0  # Seconds (0 disables)
+    permission_cache_max_entries: int = 10000
+
+    # Authenticated user cache (per process; changes from other processes apply after the TTL)
+    auth_cache_ttl: float = 60.0  # Seconds (0 disables)
+    auth_cache_max_entries: int = 10000
+
+    # Password hashing (bcrypt runs in a thread pool off the event loop)
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64  # Logins/registrations beyond this get 503 (0 disables)
+
+    # Analytics ingestion (events are buffered and written in batches)
+    analytics_flush_interval: float = 2.0  # Seconds between flushes
+    analytics_batch_size: int = 500  # Pending events that trigger an early flush
+    analytics_max_pending: int = 50000  # Events kept in memory while the database is unavailable
+    analytics_redis_spool: bool = False  # Spool events through Redis so API workers share one writer
+    analytics_rollup_interval: float = 3600.0  # Seconds between daily rollup runs (celery beat)
 
     # Redis / Celery Configuration
     redis_url: str = "redis://redis:6379/0"
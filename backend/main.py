@@ -1,10 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 from database import init_db
 from app.api import auth, documents, search, clustering
 from app.worker import celery_app
 from app.utils.init_data import ensure_default_admin
+from app.services.auth_service import token_cache, user_cache, password_pool
+from app.services.share_service import share_service
+from app.services.storage_service import storage_service
+from app.services.analytics_buffer import analytics_buffer
 
 
 @asynccontextmanager
@@ -17,9 +22,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Startup initialization error: {e}")
         # Don't fail startup if DB init fails
+    await analytics_buffer.start()
     yield
     # Shutdown
-    pass
+    try:
+        await analytics_buffer.stop()
+    except Exception as e:
+        print(f"Failed to flush analytics events on shutdown: {e}")
+    password_pool.shutdown()
 
 
 app = FastAPI(
@@ -57,3 +67,21 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-process cache and pool statistics (counters are since process start)"""
+    return {
+        "caches": {
+            "auth_tokens": token_cache.stats(),
+            "auth_users": user_cache.stats(),
+            "permissions": share_service.cache.stats(),
+            # Sums the cache directory's file sizes, so off the event loop
+            "storage_objects": await run_in_threadpool(storage_service.cache_stats),
+        },
+        "pools": {
+            "password_hashing": password_pool.stats(),
+        },
+        "analytics_buffer": analytics_buffer.stats(),
+    }
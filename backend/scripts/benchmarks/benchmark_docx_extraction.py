@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming DOCX extraction.
+
+Generates DOCX files with many paragraphs and table rows and reports the
+time and peak Python memory (tracemalloc) of app.utils.docx_stream. If
+python-docx is installed, the same files are also read through its object
+model for comparison.
+"""
+
+import argparse
+import io
+import random
+import sys
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.docx_stream import iter_docx_blocks
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+WORDS = "document vector search chunk embedding report total value the of and".split()
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+
+
+def paragraph(text: str, style: str = None) -> str:
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{properties}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def make_docx(paragraphs: int, table_rows: int, rng: random.Random) -> bytes:
+    """A DOCX with headings, body paragraphs and one large table."""
+    body = []
+    for i in range(paragraphs):
+        if i % 50 == 0:
+            body.append(paragraph(f"Section {i // 50}", "Heading1"))
+        body.append(paragraph(" ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40)))))
+    if table_rows:
+        body.append("<w:tbl>")
+        for row in range(table_rows):
+            cells = "".join(
+                f"<w:tc>{paragraph(f'{rng.choice(WORDS)} {row}.{col}')}</w:tc>" for col in range(5)
+            )
+            body.append(f"<w:tr>{cells}</w:tr>")
+        body.append("</w:tbl>")
+
+    document = f'<w:document xmlns:w="{W_NS}"><w:body>{"".join(body)}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", CONTENT_TYPES)
+        docx.writestr("_rels/.rels", RELS)
+        docx.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def extract_streaming(content: bytes) -> int:
+    return sum(len(block.text) for block in iter_docx_blocks(io.BytesIO(content)))
+
+
+def extract_python_docx(content: bytes) -> int:
+    from docx import Document
+
+    doc = Document(io.BytesIO(content))
+    total = sum(len(p.text) for p in doc.paragraphs)
+    for table in doc.tables:
+        for row in table.rows:
+            total += sum(len(cell.text) for cell in row.cells)
+    return total
+
+
+def measure(extract, content: bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    characters = extract(content)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return characters, elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", default="1000,10000", help="Comma-separated paragraph counts")
+    parser.add_argument("--table-rows", type=int, default=5000, help="Rows in the generated table")
+    args = parser.parse_args()
+
+    try:
+        import docx  # noqa: F401
+        extractors = [("streaming", extract_streaming), ("python-docx", extract_python_docx)]
+    except ImportError:
+        print("python-docx not installed; measuring streaming extraction only\n")
+        extractors = [("streaming", extract_streaming)]
+
+    rng = random.Random(42)
+    header = f"{'input':<24}{'extractor':<14}{'chars':>10}{'seconds':>10}{'peak MB':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for paragraphs in (int(n) for n in args.paragraphs.split(",")):
+        content = make_docx(paragraphs, args.table_rows, rng)
+        label = f"{paragraphs}p/{args.table_rows}r ({len(content) // 1024}KB)"
+        for name, extract in extractors:
+            characters, elapsed, peak_mb = measure(extract, content)
+            print(f"{label:<24}{name:<14}{characters:>10}{elapsed:>10.2f}{peak_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
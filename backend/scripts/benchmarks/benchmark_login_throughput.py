@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput and its effect on other requests.
+
+In-process mode (default) runs a burst of concurrent password verifications
+on one event loop, either inline (bcrypt on the loop, as the login handler
+used to) or on the password pool, while a probe coroutine stands in for
+search requests: every few milliseconds it measures how late the loop
+schedules it. With bcrypt inline the probe latency grows to the bcrypt
+cost times the number of queued logins; on the pool it stays flat.
+
+Live mode (--base-url) drives a running API instead: threads POST to
+/api/auth/login while another thread times /api/search/semantic.
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+
+def percentiles(samples):
+    if not samples:
+        return "no samples"
+    ordered = sorted(samples)
+    p = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return (f"p50 {p(0.5) * 1000:7.1f} ms   p95 {p(0.95) * 1000:7.1f} ms   "
+            f"max {ordered[-1] * 1000:7.1f} ms   (n={len(ordered)})")
+
+
+async def probe(stop: asyncio.Event, interval: float, samples: list):
+    """Record how late the event loop wakes a coroutine that sleeps for interval"""
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - scheduled - interval)
+
+
+async def run_in_process(mode: str, logins: int, concurrency: int, interval: float):
+    from app.services.auth_service import get_password_hash, verify_password, verify_password_async
+
+    hashed = get_password_hash("benchmark-password")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if mode == "inline":
+                ok = verify_password("benchmark-password", hashed)
+            else:
+                ok = await verify_password_async("benchmark-password", hashed)
+            assert ok
+
+    stop = asyncio.Event()
+    samples = []
+    probe_task = asyncio.create_task(probe(stop, interval, samples))
+    await asyncio.sleep(interval * 5)  # Baseline before the burst
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    print(f"{mode:>7}: {logins / elapsed:6.1f} logins/s   probe lag {percentiles(samples)}")
+
+
+def run_live(args):
+    import requests
+
+    token = requests.post(
+        f"{args.base_url}/api/auth/login",
+        data={"username": args.username, "password": args.password},
+        timeout=30,
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def search_latencies(stop: threading.Event, samples: list):
+        while not stop.is_set():
+            started = time.perf_counter()
+            requests.post(f"{args.base_url}/api/search/semantic", headers=headers,
+                          json={"query": args.query, "top_k": 5}, timeout=60)
+            samples.append(time.perf_counter() - started)
+            time.sleep(args.interval)
+
+    def login(_):
+        response = requests.post(f"{args.base_url}/api/auth/login",
+                                 data={"username": args.username, "password": args.password}, timeout=60)
+        return response.status_code
+
+    for label, logins in (("idle", 0), ("under login load", args.logins)):
+        stop = threading.Event()
+        samples = []
+        prober = threading.Thread(target=search_latencies, args=(stop, samples))
+        prober.start()
+        started = time.perf_counter()
+        if logins:
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                codes = list(pool.map(login, range(logins)))
+        else:
+            time.sleep(3)
+            codes = []
+        elapsed = time.perf_counter() - started
+        stop.set()
+        prober.join()
+        rate = f"{len(codes) / elapsed:6.1f} logins/s ({codes.count(503)} rejected)   " if codes else ""
+        print(f"{label:>17}: {rate}search {percentiles(samples)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64, help="Logins in the burst")
+    parser.add_argument("--concurrency", type=int, default=32, help="Logins in flight at once")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between probes")
+    parser.add_argument("--base-url", help="Benchmark a running API instead (e.g. http://localhost:8000)")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--query", default="document search")
+    args = parser.parse_args()
+
+    if args.base_url:
+        run_live(args)
+        return
+
+    for mode in ("inline", "pool"):
+        asyncio.run(run_in_process(mode, args.logins, args.concurrency, args.interval))
+
+    from app.services.auth_service import password_pool
+    stats = password_pool.stats()
+    print(f"\npool: {stats['workers']} workers, avg queue wait {stats['avg_queue_wait'] * 1000:.1f} ms, "
+          f"max {stats['max_queue_wait'] * 1000:.1f} ms, avg bcrypt {stats['avg_run_time'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
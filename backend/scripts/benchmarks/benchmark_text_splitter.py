@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark OffsetTrackingTextSplitter against RecursiveCharacterTextSplitter.
+
+Generates multi-MB synthetic documents (prose, line-broken text, and long
+runs without separators), checks that both splitters return identical
+chunks, and reports the time each takes.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.text_splitter import RecursiveCharacterTextSplitter, OffsetTrackingTextSplitter
+
+WORDS = (
+    "document qdrant vector search chunk embedding tài liệu tìm kiếm "
+    "the of and to in is for with on that by this"
+).split()
+
+
+def make_prose(size: int, rng: random.Random) -> str:
+    """Paragraphs of sentences, like extracted PDF or DOCX text."""
+    parts = []
+    total = 0
+    while total < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))).capitalize() + ". "
+        parts.append(sentence)
+        if rng.random() < 0.15:
+            parts.append("\n\n")
+        total += len(sentence)
+    return "".join(parts)
+
+
+def make_lines(size: int, rng: random.Random) -> str:
+    """Single-newline text without paragraph breaks, like OCR output or tables."""
+    parts = []
+    total = 0
+    while total < size:
+        line = " | ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        parts.append(line + "\n")
+        total += len(line) + 1
+    return "".join(parts)
+
+
+def make_unbroken(size: int, rng: random.Random) -> str:
+    """Long runs without spaces, which fall through to character splitting."""
+    runs = []
+    total = 0
+    while total < size:
+        run = "".join(rng.choice("abcdefghij0123456789") for _ in range(rng.randint(500, 5000)))
+        runs.append(run)
+        total += len(run) + 2
+    return "\n\n".join(runs)
+
+
+def time_split(splitter, text: str):
+    start = time.perf_counter()
+    chunks = splitter.split_text(text)
+    return chunks, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,4,8", help="Comma-separated document sizes in MB")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    generators = [("prose", make_prose), ("lines", make_lines), ("unbroken", make_unbroken)]
+
+    header = f"{'input':<16}{'chunks':>9}{'current s':>12}{'offset s':>11}{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for size_mb in (float(s) for s in args.sizes.split(",")):
+        size = int(size_mb * 1024 * 1024)
+        for name, generate in generators:
+            text = generate(size, rng)
+            current = RecursiveCharacterTextSplitter(args.chunk_size, args.chunk_overlap)
+            offset = OffsetTrackingTextSplitter(args.chunk_size, args.chunk_overlap)
+
+            current_chunks, current_time = time_split(current, text)
+            offset_chunks, offset_time = time_split(offset, text)
+
+            if current_chunks != offset_chunks:
+                print(f"MISMATCH on {name} {size_mb}MB", file=sys.stderr)
+                sys.exit(1)
+
+            print(
+                f"{f'{name} {size_mb:g}MB':<16}{len(offset_chunks):>9}"
+                f"{current_time:>12.2f}{offset_time:>11.2f}"
+                f"{current_time / offset_time:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
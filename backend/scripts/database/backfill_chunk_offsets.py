@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Backfill chunk offsets and page numbers for documents ingested before they
+were stored.
+
+A one-off command, separate from migrate_database.py: every affected
+document is downloaded and re-extracted, which runs OCR again on scanned
+PDFs. Chunks that still cannot be located keep NULL offsets, so running it
+again retries those documents. Requires MinIO (and OCR for scanned PDFs).
+"""
+
+import asyncio
+from database import engine
+from app.models.models import Document, DocumentChunk
+from app.services.storage_service import storage_service
+from app.services.document_processor import document_processor
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+
+async def backfill_chunk_offsets():
+    """Fill start/end offsets and page numbers for chunks ingested before they were stored.
+
+    Each affected document is downloaded and re-extracted once, and its chunks
+    are located in order in the extracted text. Chunks that cannot be found
+    (e.g. extraction changed since ingest) keep NULL offsets; preview falls
+    back to searching for them.
+    """
+    print("Backfilling chunk offsets...")
+    async with AsyncSession(engine) as session:
+        result = await session.execute(
+            select(Document.id)
+            .join(DocumentChunk)
+            .where(DocumentChunk.start_offset.is_(None))
+            .distinct()
+        )
+        document_ids = [row[0] for row in result.all()]
+        print(f"   {len(document_ids)} document(s) need backfilling")
+
+        for document_id in document_ids:
+            result = await session.execute(
+                select(Document)
+                .options(selectinload(Document.chunks))
+                .where(Document.id == document_id)
+            )
+            document = result.scalar_one()
+            try:
+                file_content = storage_service.download_file(document.file_path)
+                doc_text, page_starts = document_processor.process_document_with_pages(
+                    file_content, document.file_type
+                )
+            except Exception as e:
+                print(f"   ❌ {document.original_filename}: extraction failed ({e})")
+                continue
+
+            found = 0
+            current_position = 0
+            for chunk in sorted(document.chunks, key=lambda c: c.chunk_index):
+                chunk_start = doc_text.find(chunk.content, current_position)
+                if chunk_start < 0:
+                    continue
+                chunk_end = chunk_start + len(chunk.content)
+                chunk.start_offset = chunk_start
+                chunk.end_offset = chunk_end
+                chunk.page_start, chunk.page_end = document_processor.page_range(
+                    page_starts, chunk_start, chunk_end
+                )
+                # Chunks overlap, so the next one may start before this one ends
+                current_position = chunk_start + 1
+                found += 1
+
+            await session.commit()
+            print(f"   ✅ {document.original_filename}: {found}/{len(document.chunks)} chunks located")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_chunk_offsets())
@@ -4,15 +4,17 @@ Database migration script for comprehensive document features.
 This script adds new tables and columns to support:
 - Document versioning
 - Document sharing with user permissions
-- Document analytics tracking
+- Document analytics tracking (with daily rollups and composite indexes)
 - Document favorites/bookmarks
+- Chunk offsets and source page numbers (filled by backfill_chunk_offsets.py)
 """
 
 import asyncio
 from database import engine, Base
 from app.models.models import (
     Document, DocumentChunk, Tag, User,
-    DocumentVersion, DocumentShare, DocumentAnalytics, DocumentFavorite
+    DocumentVersion, DocumentShare, DocumentAnalytics, DocumentFavorite,
+    AnalyticsDailyRollup, AnalyticsRollupState
 )
 from sqlalchemy import text
 
@@ -90,10 +92,51 @@ async def upgrade():
             else:
                 print("   processing_error column already exists")
 
+            # Check if content_hash column exists
+            result = await conn.execute(
+                text("SELECT COUNT(*) FROM pragma_table_info('documents') WHERE name='content_hash'")
+            )
+            if result.scalar() == 0:
+                print("   Adding content_hash column to documents table...")
+                await conn.execute(text(
+                    "ALTER TABLE documents ADD COLUMN content_hash VARCHAR"
+                ))
+            else:
+                print("   content_hash column already exists")
+
         except Exception as e:
             print(f"   Error adding columns to documents table: {e}")
             print("   Continuing with table creation...")
         
+        # Add position columns to document_chunks table if they don't exist
+        print("\n1b. Checking document_chunks table for position columns...")
+        try:
+            for column in ["start_offset", "end_offset", "page_start", "page_end"]:
+                result = await conn.execute(
+                    text(f"SELECT COUNT(*) FROM pragma_table_info('document_chunks') WHERE name='{column}'")
+                )
+                if result.scalar() == 0:
+                    print(f"   Adding {column} column to document_chunks table...")
+                    await conn.execute(text(
+                        f"ALTER TABLE document_chunks ADD COLUMN {column} INTEGER"
+                    ))
+                else:
+                    print(f"   {column} column already exists")
+            
+            result = await conn.execute(
+                text("SELECT COUNT(*) FROM pragma_table_info('document_chunks') WHERE name='heading_path'")
+            )
+            if result.scalar() == 0:
+                print("   Adding heading_path column to document_chunks table...")
+                await conn.execute(text(
+                    "ALTER TABLE document_chunks ADD COLUMN heading_path JSON"
+                ))
+            else:
+                print("   heading_path column already exists")
+        except Exception as e:
+            print(f"   Error adding columns to document_chunks table: {e}")
+            print("   Continuing with table creation...")
+        
         # Create new tables
         print("\n2. Creating new tables...")
         
@@ -119,6 +162,12 @@ async def upgrade():
             print(f"   Created new tables: {created_tables}")
         else:
             print("   All tables already existed")
+        
+        # create_all skips the indexes of tables that already exist
+        print("\n3. Creating analytics indexes...")
+        for index in DocumentAnalytics.__table__.indexes:
+            await conn.run_sync(lambda sync_conn: index.create(sync_conn, checkfirst=True))
+            print(f"   {index.name} ready")
     
     print("\n✅ Database migration completed successfully!")
 
@@ -142,7 +191,9 @@ async def verify():
             'document_versions',
             'document_shares',
             'document_analytics',
-            'document_favorites'
+            'document_favorites',
+            'analytics_daily_rollups',
+            'analytics_rollup_state'
         ]
         
         print("\nNew tables:")
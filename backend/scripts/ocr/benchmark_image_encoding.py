@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark OCR image encoding settings.
+
+Rasterizes a few pages of a PDF (or loads an image), encodes them with each
+preprocessing setting and sends them to an OpenAI-compatible endpoint,
+reporting payload size, encode time and round-trip time per setting.
+
+Start the local stub first (scripts/ocr/ocr_stub_server.py), e.g. with
+STUB_FAILURE_RATE=0 STUB_BANDWIDTH=2000000 to simulate a ~2 MB/s uplink.
+"""
+
+import argparse
+import base64
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from openai import OpenAI
+from PIL import Image
+from pdf2image import convert_from_path
+
+from ocr_extractor.image_encoding import MIME_TYPES, prepare_image, encode_image_bytes
+
+# (label, format, quality, grayscale, max_pixels)
+SETTINGS = [
+    ("png colour (current)", "png", 85, False, 0),
+    ("png gray", "png", 85, True, 0),
+    ("jpeg q85 colour", "jpeg", 85, False, 0),
+    ("jpeg q85 gray", "jpeg", 85, True, 0),
+    ("jpeg q75 gray 4MP", "jpeg", 75, True, 4_000_000),
+    ("webp q80 gray", "webp", 80, True, 0),
+    ("webp q75 gray 4MP", "webp", 75, True, 4_000_000),
+]
+
+
+def load_pages(path: str, dpi: int, pages: int):
+    if path.lower().endswith(".pdf"):
+        return convert_from_path(path, dpi=dpi, first_page=1, last_page=pages)
+    return [Image.open(path).convert("RGB")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="PDF or image file")
+    parser.add_argument("--pages", type=int, default=3, help="Number of PDF pages to use")
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--base-url", default="http://localhost:8089/v1")
+    parser.add_argument("--api-key", default="stub")
+    parser.add_argument("--model", default="stub")
+    args = parser.parse_args()
+
+    client = OpenAI(api_key=args.api_key, base_url=args.base_url, max_retries=0)
+    images = load_pages(args.input, args.dpi, args.pages)
+    print(f"Loaded {len(images)} page(s) at {args.dpi} DPI from {args.input}\n")
+
+    header = f"{'setting':<24}{'avg payload':>14}{'encode ms':>12}{'round trip ms':>16}"
+    print(header)
+    print("-" * len(header))
+
+    for label, image_format, quality, grayscale, max_pixels in SETTINGS:
+        payload_sizes, encode_times, round_trips = [], [], []
+        for image in images:
+            start = time.perf_counter()
+            prepared = prepare_image(image, grayscale=grayscale, max_pixels=max_pixels)
+            encoded = base64.b64encode(
+                encode_image_bytes(prepared, image_format=image_format, quality=quality)
+            ).decode("utf-8")
+            encode_times.append((time.perf_counter() - start) * 1000)
+            payload_sizes.append(len(encoded))
+
+            start = time.perf_counter()
+            client.chat.completions.create(
+                model=args.model,
+                messages=[{
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "Extract all text from this image."},
+                        {"type": "image_url", "image_url": f"data:{MIME_TYPES[image_format]};base64,{encoded}"},
+                    ],
+                }],
+            )
+            round_trips.append((time.perf_counter() - start) * 1000)
+
+        print(
+            f"{label:<24}"
+            f"{statistics.mean(payload_sizes) / 1024:>11.0f} KB"
+            f"{statistics.mean(encode_times):>12.1f}"
+            f"{statistics.mean(round_trips):>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
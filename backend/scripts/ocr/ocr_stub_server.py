@@ -0,0 +1,109 @@
+"""
+Local OpenAI-compatible stub for the OCR endpoint.
+
+Serves POST /v1/chat/completions (and /chat/completions) with a canned
+completion after a configurable delay (optionally proportional to the
+request size, to simulate upload bandwidth), and fails a configurable fraction
+of requests with 429/503 so retry and rate limiting can be exercised
+without calling the real OCR provider.
+
+Point the backend at it with:
+    OCR_API_KEY=stub OCR_BASE_URL=http://localhost:8089/v1
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = os.getenv("STUB_HOST", "127.0.0.1")
+PORT = int(os.getenv("STUB_PORT", "8089"))
+LATENCY = float(os.getenv("STUB_LATENCY", "0.5"))  # Seconds per request
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0.1"))  # Fraction answered with 429/503
+BANDWIDTH = float(os.getenv("STUB_BANDWIDTH", "0"))  # Simulated upload bytes/second (0 disables)
+
+_lock = threading.Lock()
+_stats = {"requests": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0, "bytes_received": 0}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status_code, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with _lock:
+                self._send_json(200, dict(_stats))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        with _lock:
+            _stats["requests"] += 1
+            _stats["bytes_received"] += length
+            _stats["in_flight"] += 1
+            _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+
+        try:
+            time.sleep(LATENCY + (length / BANDWIDTH if BANDWIDTH > 0 else 0))
+
+            if random.random() < FAILURE_RATE:
+                with _lock:
+                    _stats["failures"] += 1
+                if random.random() < 0.5:
+                    self._send_json(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0.2"})
+                else:
+                    self._send_json(503, {"error": {"message": "service unavailable"}})
+                return
+
+            request = json.loads(body or b"{}")
+            self._send_json(200, {
+                "id": f"chatcmpl-stub-{int(time.time() * 1000)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": f"Stub OCR text ({length} bytes received)"},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+        finally:
+            with _lock:
+                _stats["in_flight"] -= 1
+
+
+def main():
+    server = ThreadingHTTPServer((HOST, PORT), StubHandler)
+    print(f"OCR stub listening on http://{HOST}:{PORT}/v1 "
+          f"(latency={LATENCY}s, failure_rate={FAILURE_RATE})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Export or import the chunk corpus (text, document metadata and vectors) as
+Parquet or Arrow IPC files.
+
+export: scrolls the Qdrant collection with vectors in large pages, joins
+each page to document_chunks/documents with one query, and appends it to
+the output file as a record batch, so memory stays bounded by the page
+size. Vectors can be stored as float16 to halve their size.
+
+import: reads a file written by export in batches and upserts the points
+(with their vectors, so nothing is re-embedded) into Qdrant. With
+--restore-db it also recreates missing documents and document_chunks rows;
+the original files must be copied to MinIO separately (e.g. mc mirror).
+
+Requires pyarrow (pip install pyarrow).
+
+Usage:
+    cd backend
+    python scripts/qdrant/corpus_arrow.py export corpus.parquet [--float16] [--page-size 2048]
+    python scripts/qdrant/corpus_arrow.py import corpus.parquet [--restore-db] [--batch-size 1024]
+
+Use a .arrow or .feather extension for Arrow IPC instead of Parquet.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import Document, DocumentChunk
+from config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    print("❌ pyarrow is required: pip install pyarrow")
+    sys.exit(1)
+
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+
+# Document columns carried on every chunk row, so a fresh database can be rebuilt
+DOCUMENT_COLUMNS = [
+    ("filename", pa.string()),
+    ("original_filename", pa.string()),
+    ("file_type", pa.string()),
+    ("file_path", pa.string()),
+    ("file_size", pa.int64()),
+    ("content_hash", pa.string()),
+    ("owner_id", pa.int64()),
+    ("description", pa.string()),
+    ("is_public", pa.string()),
+    ("upload_date", pa.timestamp("us")),
+]
+
+
+def corpus_schema(dimension: int, vector_type: pa.DataType, metadata: dict) -> pa.Schema:
+    fields = [
+        pa.field("point_id", pa.string(), nullable=False),
+        pa.field("document_id", pa.int64()),
+        pa.field("chunk_index", pa.int32()),
+        pa.field("content", pa.string()),
+        pa.field("start_offset", pa.int32()),
+        pa.field("end_offset", pa.int32()),
+        pa.field("page_start", pa.int32()),
+        pa.field("page_end", pa.int32()),
+        pa.field("heading_path", pa.list_(pa.string())),
+    ]
+    fields += [pa.field(name, type_) for name, type_ in DOCUMENT_COLUMNS]
+    fields.append(pa.field("vector", pa.list_(vector_type, dimension), nullable=False))
+    return pa.schema(fields, metadata={k: json.dumps(v) for k, v in metadata.items()})
+
+
+def sync_session():
+    engine = create_engine(settings.database_url.replace("+aiosqlite", ""))
+    return sessionmaker(bind=engine)()
+
+
+def qdrant_client() -> QdrantClient:
+    return QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port, timeout=120)
+
+
+def collection_vector(client: QdrantClient, collection: str, vector_name: str = None):
+    """(name, VectorParams) of the collection's named vector (the only one unless vector_name is given)"""
+    vectors = client.get_collection(collection).config.params.vectors
+    if not isinstance(vectors, dict):
+        raise SystemExit("❌ Collection uses an unnamed vector; only named vectors are supported")
+    if vector_name is None:
+        if len(vectors) != 1:
+            raise SystemExit(f"❌ Collection has several vectors, pick one with --vector-name: {list(vectors)}")
+        vector_name = next(iter(vectors))
+    if vector_name not in vectors:
+        raise SystemExit(f"❌ Vector '{vector_name}' not found in collection: {list(vectors)}")
+    return vector_name, vectors[vector_name]
+
+
+class CorpusWriter:
+    """Append record batches to a Parquet or Arrow IPC file"""
+
+    def __init__(self, path: Path, schema: pa.Schema, compression: str):
+        if path.suffix in ARROW_SUFFIXES:
+            self.sink = pa.OSFile(str(path), "wb")
+            self.writer = ipc.new_file(self.sink, schema)
+        else:
+            self.sink = None
+            self.writer = pq.ParquetWriter(str(path), schema, compression=compression)
+
+    def write(self, batch: pa.RecordBatch):
+        if self.sink is None:
+            self.writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+
+
+def export_corpus(args):
+    client = qdrant_client()
+    collection = settings.qdrant_collection_name
+    vector_name, vector_params = collection_vector(client, collection, args.vector_name)
+    dimension = vector_params.size
+    vector_type = pa.float16() if args.float16 else pa.float32()
+    numpy_type = np.float16 if args.float16 else np.float32
+
+    schema = corpus_schema(dimension, vector_type, {
+        "collection": collection,
+        "vector_name": vector_name,
+        "dimension": dimension,
+        "distance": str(vector_params.distance),
+        "embedding_model": settings.embedding_model,
+        "embedding_model_name": settings.embedding_model_name,
+        "exported_at": datetime.utcnow().isoformat(),
+    })
+
+    db = sync_session()
+    writer = CorpusWriter(Path(args.output), schema, args.compression)
+    started = time.perf_counter()
+    total = 0
+    orphans = 0
+    offset = None
+    try:
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection,
+                limit=args.page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=[vector_name],
+            )
+            if not points:
+                break
+
+            # One joined query per page instead of a lookup per point
+            point_ids = [str(point.id) for point in points]
+            rows = {
+                chunk.qdrant_point_id: (chunk, document)
+                for chunk, document in db.query(DocumentChunk, Document)
+                .join(Document, DocumentChunk.document_id == Document.id)
+                .filter(DocumentChunk.qdrant_point_id.in_(point_ids))
+            }
+
+            columns = {field.name: [] for field in schema}
+            vectors = np.empty((len(points), dimension), dtype=numpy_type)
+            for i, point in enumerate(points):
+                payload = point.payload or {}
+                chunk, document = rows.get(str(point.id), (None, None))
+                if chunk is None:
+                    orphans += 1
+                vectors[i] = point.vector[vector_name]
+
+                columns["point_id"].append(str(point.id))
+                columns["document_id"].append(chunk.document_id if chunk else payload.get("document_id"))
+                columns["chunk_index"].append(chunk.chunk_index if chunk else payload.get("chunk_index"))
+                columns["content"].append(chunk.content if chunk else payload.get("document"))
+                columns["start_offset"].append(chunk.start_offset if chunk else None)
+                columns["end_offset"].append(chunk.end_offset if chunk else None)
+                columns["page_start"].append(chunk.page_start if chunk else payload.get("page_start"))
+                columns["page_end"].append(chunk.page_end if chunk else payload.get("page_end"))
+                columns["heading_path"].append(chunk.heading_path if chunk else payload.get("heading_path"))
+                for name, _ in DOCUMENT_COLUMNS:
+                    if document is not None:
+                        columns[name].append(getattr(document, name))
+                    elif name in ("original_filename", "filename"):
+                        columns[name].append(payload.get("filename"))
+                    elif name == "owner_id":
+                        columns[name].append(payload.get("owner_id"))
+                    else:
+                        columns[name].append(None)
+
+            arrays = [
+                pa.array(columns[field.name], type=field.type)
+                for field in schema if field.name != "vector"
+            ]
+            arrays.append(pa.FixedSizeListArray.from_arrays(
+                pa.array(vectors.reshape(-1), type=vector_type), dimension
+            ))
+            writer.write(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+            total += len(points)
+            print(f"   {total} points exported...", end="\r")
+            if offset is None:
+                break
+    finally:
+        writer.close()
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Exported {total} points to {args.output} in {elapsed:.1f}s")
+    if orphans:
+        print(f"   ⚠️  {orphans} points had no document_chunks row (exported from the Qdrant payload)")
+
+
+def iter_corpus_batches(path: Path, batch_size: int):
+    """Yield (schema, record batch) from a Parquet or Arrow IPC corpus file without reading it all"""
+    if path.suffix in ARROW_SUFFIXES:
+        with pa.memory_map(str(path), "r") as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.schema, reader.get_batch(i)
+    else:
+        parquet_file = pq.ParquetFile(str(path))
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield parquet_file.schema_arrow, batch
+
+
+def import_corpus(args):
+    client = qdrant_client()
+    collection = settings.qdrant_collection_name
+    db = sync_session() if args.restore_db else None
+    started = time.perf_counter()
+    total = 0
+    checked = False
+    try:
+        for schema, batch in iter_corpus_batches(Path(args.input), args.batch_size):
+            if not checked:
+                metadata = {k.decode(): json.loads(v) for k, v in (schema.metadata or {}).items()}
+                vector_name, vector_params = collection_vector(client, collection, args.vector_name or metadata.get("vector_name"))
+                if vector_params.size != metadata.get("dimension"):
+                    raise SystemExit(
+                        f"❌ Vector size mismatch: file has {metadata.get('dimension')}, "
+                        f"collection '{collection}' expects {vector_params.size}"
+                    )
+                if metadata.get("embedding_model_name") != settings.embedding_model_name:
+                    print(f"⚠️  File was embedded with {metadata.get('embedding_model_name')}, "
+                          f"this environment uses {settings.embedding_model_name}")
+                checked = True
+
+            dimension = vector_params.size
+            vectors = batch.column("vector").flatten().to_numpy(zero_copy_only=False)
+            vectors = vectors.astype(np.float32, copy=False).reshape(-1, dimension)
+            rows = pa.Table.from_batches([batch]).select(
+                [name for name in batch.schema.names if name != "vector"]
+            ).to_pylist()
+
+            points = []
+            for row, vector in zip(rows, vectors):
+                heading_path = row["heading_path"]
+                points.append(PointStruct(
+                    id=row["point_id"],
+                    vector={vector_name: vector.tolist()},
+                    payload={
+                        "document": row["content"],
+                        "document_id": row["document_id"],
+                        "filename": row["original_filename"],
+                        "owner_id": row["owner_id"],
+                        "chunk_index": row["chunk_index"],
+                        "page_start": row["page_start"],
+                        "page_end": row["page_end"],
+                        "heading_path": heading_path,
+                        "section": heading_path[-1] if heading_path else None,
+                    },
+                ))
+            client.upsert(collection_name=collection, points=points, wait=False)
+
+            if db is not None:
+                restore_rows(db, rows)
+
+            total += len(points)
+            print(f"   {total} points imported...", end="\r")
+    finally:
+        if db is not None:
+            db.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Imported {total} points into '{collection}' in {elapsed:.1f}s")
+
+
+def restore_rows(db, rows):
+    """Create documents and document_chunks rows that do not exist yet"""
+    document_ids = {row["document_id"] for row in rows if row["document_id"] is not None}
+    existing_documents = {
+        doc_id for (doc_id,) in db.query(Document.id).filter(Document.id.in_(document_ids))
+    }
+    existing_chunks = {
+        point_id for (point_id,) in db.query(DocumentChunk.qdrant_point_id)
+        .filter(DocumentChunk.qdrant_point_id.in_([row["point_id"] for row in rows]))
+    }
+
+    for row in rows:
+        doc_id = row["document_id"]
+        if doc_id is None:
+            continue
+        if doc_id not in existing_documents and row["file_path"] is not None:
+            db.add(Document(
+                id=doc_id,
+                status="completed",
+                **{name: row[name] for name, _ in DOCUMENT_COLUMNS}
+            ))
+            existing_documents.add(doc_id)
+        if row["point_id"] not in existing_chunks:
+            db.add(DocumentChunk(
+                document_id=doc_id,
+                chunk_index=row["chunk_index"],
+                content=row["content"],
+                qdrant_point_id=row["point_id"],
+                start_offset=row["start_offset"],
+                end_offset=row["end_offset"],
+                page_start=row["page_start"],
+                page_end=row["page_end"],
+                heading_path=row["heading_path"],
+            ))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write chunks and vectors to a file")
+    export_parser.add_argument("output", help="Output file (.parquet, or .arrow for Arrow IPC)")
+    export_parser.add_argument("--page-size", type=int, default=2048, help="Points per Qdrant scroll page")
+    export_parser.add_argument("--float16", action="store_true", help="Store vectors as float16")
+    export_parser.add_argument("--compression", default="zstd", help="Parquet compression codec")
+    export_parser.add_argument("--vector-name", help="Named vector to export (default: the only one)")
+
+    import_parser = subparsers.add_parser("import", help="Load chunks and vectors from a file")
+    import_parser.add_argument("input", help="File written by export")
+    import_parser.add_argument("--batch-size", type=int, default=1024, help="Points per Qdrant upsert")
+    import_parser.add_argument("--restore-db", action="store_true",
+                               help="Also create missing documents and document_chunks rows")
+    import_parser.add_argument("--vector-name", help="Named vector to import into (default: from the file)")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_corpus(args)
+    else:
+        import_corpus(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -53,6 +53,7 @@ export interface ChunkMatch {
   chunk_index: number;
   chunk_content: string;
   score: number;
+  heading_path?: string[] | null;
 }
 
 export interface SearchResult {
@@ -72,9 +73,12 @@ export interface RAGResponse {
 export interface ChunkInfo {
   chunk_id: number;
   chunk_index: number;
-  start: number;
+  start: number;  // Offset in the full document text
   end: number;
-  content: string;
+  page_start?: number | null;
+  page_end?: number | null;
+  heading_path?: string[] | null;  // Headings above the chunk (Markdown/DOCX)
+  content?: string;  // Only returned with include_chunk_content=true
   highlighted: boolean;
   score?: number;  // Match score for this chunk (0-1)
 }
@@ -85,6 +89,8 @@ export interface DocumentPreview {
   file_type: string;
   content: string;
   preview_length: number;
+  window_start: number;
+  window_end?: number;
   chunks?: ChunkInfo[];
 }
 
@@ -223,6 +229,20 @@ export const previewDocument = async (id: number, highlightChunks?: number[], ch
   return response.data;
 };
 
+// Fetch the original file (streamed by the API; supports Range requests)
+export const downloadDocument = async (id: number) => {
+  const response = await api.get(`/api/documents/${id}/download`, {
+    responseType: 'blob',
+  });
+  return response.data;
+};
+
+// Short-lived URL to fetch the original file directly from storage
+export const getDocumentDownloadUrl = async (id: number): Promise<{ url: string; expires_in: number }> => {
+  const response = await api.get(`/api/documents/${id}/download?presigned=true`);
+  return response.data;
+};
+
 export const getTags = async () => {
   const response = await api.get('/api/documents/tags/all');
   return response.data;
@@ -347,6 +367,60 @@ export const exportDocumentsCSV = async (documentIds: number[]) => {
   return response.data;
 };
 
+export const exportDocumentsNDJSON = async (documentIds: number[]) => {
+  const response = await api.post('/api/documents/export/ndjson', {
+    document_ids: documentIds,
+    format: 'ndjson',
+  }, {
+    responseType: 'blob',
+  });
+  return response.data;
+};
+
+// Background export jobs (for large selections)
+export interface ExportJob {
+  id: string;
+  format: 'zip' | 'json' | 'csv' | 'ndjson';
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'expired';  // expired: file deleted after the retention period
+  total_documents: number;
+  processed_documents: number;
+  progress: number;  // 0-1
+  file_size?: number | null;
+  error?: string | null;
+  created_at: string;
+  completed_at?: string | null;
+  download_url?: string | null;  // Presigned URL once completed
+}
+
+export const createExportJob = async (documentIds: number[], format: ExportJob['format'] = 'zip'): Promise<ExportJob> => {
+  const response = await api.post('/api/documents/export/jobs', {
+    document_ids: documentIds,
+    format,
+  });
+  return response.data;
+};
+
+export const getExportJob = async (jobId: string): Promise<ExportJob> => {
+  const response = await api.get(`/api/documents/export/jobs/${jobId}`);
+  return response.data;
+};
+
+// Poll an export job until it finishes; rejects if it failed or its file has expired
+export const waitForExportJob = async (
+  jobId: string,
+  onProgress?: (job: ExportJob) => void,
+  intervalMs: number = 1000
+): Promise<ExportJob> => {
+  for (;;) {
+    const job = await getExportJob(jobId);
+    onProgress?.(job);
+    if (job.status === 'completed') return job;
+    if (job.status === 'failed') throw new Error(job.error || 'Export failed');
+    if (job.status === 'expired') throw new Error('Export file has expired; start a new export');
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
 // Search APIs
 export const semanticSearch = async (query: string, topK: number = 5) => {
   const response = await api.post('/api/search/semantic', { query, top_k: topK });
@@ -0,0 +1,117 @@
+"""Persistent OCR result cache.
+
+Results are stored in a SQLite file keyed by a hash of the OCR model name,
+the prompt and the decoded pixels of the page image. The backend installs
+this package and its ``OCRService`` uses this module too, so pointing both
+at the same ``OCR_CACHE_PATH`` lets them share results.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+def image_digest(image) -> str:
+    """Hash the decoded pixels of a PIL image.
+
+    Hashing pixels rather than encoded bytes makes the key independent of
+    the file format and encoder settings used to store the page.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def make_cache_key(model_name: str, prompt: str, image_hash: str) -> str:
+    """Build the cache key for an OCR request."""
+    return hashlib.sha256(
+        "\0".join((model_name, prompt, image_hash)).encode("utf-8")
+    ).hexdigest()
+
+
+class OCRCache:
+    """Size-bounded SQLite cache of OCR results with least-recently-used eviction."""
+
+    def __init__(self, path: str, max_bytes: int):
+        """Open (or create) the cache.
+
+        Args:
+            path: Path of the SQLite database file
+            max_bytes: Maximum total size of cached text before eviction
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Yield a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for a key, or None on a miss."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM ocr_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE ocr_cache SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            return row[0]
+
+    def set(self, key: str, text: str) -> None:
+        """Store text for a key and evict the oldest entries if over budget."""
+        size = len(text.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, text, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            # Keep the most recently used entries whose cumulative size fits
+            conn.execute(
+                """
+                DELETE FROM ocr_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (
+                            ORDER BY last_access DESC, key
+                        ) AS running_size
+                        FROM ocr_cache
+                    ) WHERE running_size > ?
+                )
+                """,
+                (self.max_bytes,),
+            )
+
+    def total_size(self) -> int:
+        """Total size in bytes of all cached text."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM ocr_cache"
+            ).fetchone()[0]
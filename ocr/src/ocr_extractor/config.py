@@ -20,6 +20,16 @@ class Settings(BaseSettings):
     max_tokens: int = Field(default=2048, alias="OCR_MAX_TOKENS")
     temperature: float = Field(default=1.0, alias="OCR_TEMPERATURE")
 
+    # Image Encoding Configuration
+    image_format: str = Field(default="png", alias="OCR_IMAGE_FORMAT")  # png, jpeg, webp
+    image_quality: int = Field(default=85, alias="OCR_IMAGE_QUALITY")
+    image_grayscale: bool = Field(default=False, alias="OCR_IMAGE_GRAYSCALE")
+    image_max_pixels: int = Field(default=0, alias="OCR_IMAGE_MAX_PIXELS")  # 0 disables
+
+    # Cache Configuration (empty path disables the cache)
+    cache_path: str = Field(default=".ocr_cache.db", alias="OCR_CACHE_PATH")
+    cache_max_bytes: int = Field(default=100_000_000, alias="OCR_CACHE_MAX_BYTES")
+
     # Output Configuration
     output_dir: str = Field(default="img", alias="OCR_OUTPUT_DIR")
     default_output_file: str = Field(
@@ -8,11 +8,21 @@ from typing import Dict, List, Optional
 from docx import Document
 from openai import OpenAI
 from pdf2image import convert_from_path
+from PIL import Image
 
+from .cache import OCRCache, image_digest, make_cache_key
 from .config import settings
+from .image_encoding import (
+    MIME_TYPES,
+    encode_image_bytes,
+    encoding_profile,
+    prepare_image,
+)
 
 logger = logging.getLogger(__name__)
 
+OCR_PROMPT = "Extract all text from this image. Preserve formatting and structure."
+
 
 class PDFTextExtractor:
     """Main class for PDF to text extraction using OCR."""
@@ -21,6 +31,14 @@ class PDFTextExtractor:
         """Initialize the extractor with API client."""
         self.client = OpenAI(api_key=settings.api_key, base_url=settings.base_url)
         self.extracted_data: List[Dict] = []
+        self._cache: Optional[OCRCache] = None
+
+    @property
+    def cache(self) -> Optional[OCRCache]:
+        """OCR result cache, opened on first use (None when disabled)."""
+        if self._cache is None and settings.cache_path:
+            self._cache = OCRCache(settings.cache_path, settings.cache_max_bytes)
+        return self._cache
 
     def extract_images_from_pdf(
         self, pdf_path: str, output_dir: Optional[str] = None
@@ -58,16 +76,63 @@ class PDFTextExtractor:
             logger.error(f"Error extracting images: {e}")
             raise
 
+    @staticmethod
+    def _needs_preprocessing() -> bool:
+        """Whether images must be re-encoded rather than sent as saved PNGs."""
+        return (
+            settings.image_format.lower() != "png"
+            or settings.image_grayscale
+            or settings.image_max_pixels > 0
+        )
+
+    @staticmethod
+    def _encoding_profile() -> str:
+        return encoding_profile(
+            settings.image_format,
+            settings.image_quality,
+            settings.image_grayscale,
+            settings.image_max_pixels,
+        )
+
     def encode_image(self, image_path: str) -> str:
-        """Encode image to base64."""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
+        """Encode image to base64, applying the configured preprocessing."""
+        if not self._needs_preprocessing():
+            with open(image_path, "rb") as image_file:
+                return base64.b64encode(image_file.read()).decode("utf-8")
+
+        with Image.open(image_path) as image:
+            prepared = prepare_image(
+                image,
+                grayscale=settings.image_grayscale,
+                max_pixels=settings.image_max_pixels,
+            )
+            image_bytes = encode_image_bytes(
+                prepared,
+                image_format=settings.image_format,
+                quality=settings.image_quality,
+            )
+        return base64.b64encode(image_bytes).decode("utf-8")
 
     def extract_text_from_image(self, image_path: str) -> str:
         """Extract text from a single image using OCR API."""
         try:
             logger.info(f"Processing: {Path(image_path).name}")
+
+            cache_key = None
+            if self.cache is not None:
+                with Image.open(image_path) as image:
+                    cache_key = make_cache_key(
+                        settings.model_name,
+                        OCR_PROMPT,
+                        f"{image_digest(image)}:{self._encoding_profile()}",
+                    )
+                cached_text = self.cache.get(cache_key)
+                if cached_text is not None:
+                    logger.info(f"OCR cache hit ({len(cached_text)} characters)")
+                    return cached_text
+
             base64_image = self.encode_image(image_path)
+            mime_type = MIME_TYPES[settings.image_format.lower()]
 
             response = self.client.chat.completions.create(
                 model=settings.model_name,
@@ -77,11 +142,11 @@ class PDFTextExtractor:
                         "content": [
                             {
                                 "type": "text",
-                                "text": "Extract all text from this image. Preserve formatting and structure.",
+                                "text": OCR_PROMPT,
                             },
                             {
                                 "type": "image_url",
-                                "image_url": f"data:image/png;base64,{base64_image}",
+                                "image_url": f"data:{mime_type};base64,{base64_image}",
                             },
                         ],
                     }
@@ -96,6 +161,8 @@ class PDFTextExtractor:
 
             extracted_text = response.choices[0].message.content
             logger.info(f"Text extracted ({len(extracted_text)} characters)")
+            if cache_key is not None and extracted_text is not None:
+                self.cache.set(cache_key, extracted_text)
             return extracted_text
 
         except Exception as e:
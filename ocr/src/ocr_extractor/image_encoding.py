@@ -0,0 +1,71 @@
+"""Image preprocessing and encoding for OCR payloads.
+
+Shared with the backend's OCR service; the encoding profile is part of
+the OCR cache key.
+"""
+
+import io
+import math
+
+from PIL import Image
+
+MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+
+def prepare_image(image: Image.Image, grayscale: bool = False, max_pixels: int = 0) -> Image.Image:
+    """Convert an image to grayscale and/or downscale it to a pixel budget.
+
+    Args:
+        image: Source PIL image (not modified)
+        grayscale: Convert to 8-bit grayscale
+        max_pixels: Maximum width * height; 0 keeps the original size
+
+    Returns:
+        The processed image (may be the original when nothing changes)
+    """
+    if grayscale and image.mode != "L":
+        image = image.convert("L")
+
+    width, height = image.size
+    if max_pixels and width * height > max_pixels:
+        scale = math.sqrt(max_pixels / (width * height))
+        new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        image = image.resize(new_size, Image.LANCZOS)
+
+    return image
+
+
+def encode_image_bytes(image: Image.Image, image_format: str = "png", quality: int = 85) -> bytes:
+    """Encode an image as PNG, JPEG or WebP.
+
+    Args:
+        image: PIL image to encode
+        image_format: One of "png", "jpeg", "webp"
+        quality: Quality for lossy formats (1-100)
+
+    Returns:
+        Encoded image bytes
+    """
+    image_format = image_format.lower()
+    if image_format not in MIME_TYPES:
+        raise ValueError(f"Unsupported image format: {image_format}")
+
+    if image_format != "png" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffered = io.BytesIO()
+    if image_format == "png":
+        image.save(buffered, format="PNG")
+    else:
+        image.save(buffered, format=image_format.upper(), quality=quality)
+    return buffered.getvalue()
+
+
+def encoding_profile(image_format: str, quality: int, grayscale: bool, max_pixels: int) -> str:
+    """Describe encoding settings; used to keep OCR cache entries per setting."""
+    colour = "gray" if grayscale else "colour"
+    return f"{image_format.lower()}:q{quality}:{colour}:{max_pixels}"
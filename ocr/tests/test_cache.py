@@ -0,0 +1,57 @@
+"""Tests for the OCR result cache."""
+
+from ocr_extractor.cache import OCRCache, image_digest, make_cache_key
+
+
+class FakeImage:
+    """Minimal stand-in for a PIL image."""
+
+    def __init__(self, data: bytes, mode: str = "RGB", size=(2, 2)):
+        self.data = data
+        self.mode = mode
+        self.size = size
+
+    def tobytes(self) -> bytes:
+        return self.data
+
+
+class TestOCRCache:
+    """Test cases for OCRCache."""
+
+    def test_get_set(self, tmp_path):
+        """Test storing and retrieving a result."""
+        cache = OCRCache(str(tmp_path / "cache.db"), max_bytes=1000)
+
+        assert cache.get("missing") is None
+        cache.set("key", "page text")
+        assert cache.get("key") == "page text"
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test that two caches on the same file see each other's entries."""
+        path = str(tmp_path / "cache.db")
+        OCRCache(path, max_bytes=1000).set("key", "shared")
+
+        assert OCRCache(path, max_bytes=1000).get("key") == "shared"
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the oldest entries are evicted when over budget."""
+        cache = OCRCache(str(tmp_path / "cache.db"), max_bytes=10)
+        cache.set("a", "aaaa")
+        cache.set("b", "bbbb")
+        cache.get("a")  # Touch "a" so "b" becomes the oldest
+        cache.set("c", "cccc")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+        assert cache.get("c") == "cccc"
+        assert cache.total_size() <= 10
+
+    def test_cache_key(self):
+        """Test that keys depend on model, prompt and pixels."""
+        digest = image_digest(FakeImage(b"pixels"))
+
+        assert digest == image_digest(FakeImage(b"pixels"))
+        assert digest != image_digest(FakeImage(b"other"))
+        assert digest != image_digest(FakeImage(b"pixels", mode="L"))
+        assert make_cache_key("m", "p", digest) != make_cache_key("m2", "p", digest)
+        assert make_cache_key("m", "p", digest) != make_cache_key("m", "p2", digest)
@@ -0,0 +1,58 @@
+"""Tests for OCR image preprocessing and encoding."""
+
+import pytest
+from PIL import Image
+
+from ocr_extractor.image_encoding import (
+    encode_image_bytes,
+    encoding_profile,
+    prepare_image,
+)
+
+
+class TestImageEncoding:
+    """Test cases for image preprocessing and encoding."""
+
+    def test_prepare_image_grayscale(self):
+        """Test grayscale conversion."""
+        image = Image.new("RGB", (10, 10), "red")
+
+        assert prepare_image(image, grayscale=True).mode == "L"
+        assert prepare_image(image).mode == "RGB"
+
+    def test_prepare_image_downscale(self):
+        """Test downscaling to a pixel budget keeps the aspect ratio."""
+        image = Image.new("RGB", (400, 200), "white")
+
+        result = prepare_image(image, max_pixels=20000)
+
+        assert result.size[0] * result.size[1] <= 20000
+        assert result.size == (200, 100)
+        assert prepare_image(image, max_pixels=10**6).size == (400, 200)
+
+    @pytest.mark.parametrize("image_format", ["png", "jpeg", "webp"])
+    def test_encode_image_bytes(self, image_format):
+        """Test that encoded bytes decode back to an image of the same size."""
+        import io
+
+        image = Image.new("RGBA", (32, 16), (0, 128, 255, 255))
+
+        data = encode_image_bytes(image, image_format=image_format, quality=50)
+
+        with Image.open(io.BytesIO(data)) as decoded:
+            assert decoded.format == image_format.upper()
+            assert decoded.size == (32, 16)
+
+    def test_encode_image_bytes_unsupported(self):
+        """Test error on unknown formats."""
+        with pytest.raises(ValueError):
+            encode_image_bytes(Image.new("RGB", (1, 1)), image_format="bmp")
+
+    def test_encoding_profile(self):
+        """Test that profiles differ per setting."""
+        assert encoding_profile("jpeg", 85, False, 0) != encoding_profile(
+            "jpeg", 85, True, 0
+        )
+        assert encoding_profile("JPEG", 85, False, 0) == encoding_profile(
+            "jpeg", 85, False, 0
+        )